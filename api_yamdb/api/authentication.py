@@ -0,0 +1,108 @@
+# api/authentication.py
+
+import time
+
+from django.conf import settings
+from django.utils.translation import ugettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed, InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import datetime_to_epoch
+
+from reviews.models import User
+
+from .cache import get_cache
+
+ISSUED_AT_CLAIM = 'iat'
+USER_CLAIMS = ('username', 'role', 'is_staff')
+SNAPSHOT_FIELDS = ('id', 'is_active') + USER_CLAIMS
+
+SNAPSHOT_KEY = 'api:auth:user:{}'
+REVOKED_KEY = 'api:auth:revoked:{}'
+
+
+def get_token_for_user(user):
+    """Токен доступа с ролью пользователя в утверждениях."""
+    token = AccessToken.for_user(user)
+    token[ISSUED_AT_CLAIM] = datetime_to_epoch(token.current_time)
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def forget_user(user_id):
+    """Отзывает утверждения выданных токенов и снимок пользователя."""
+    cache = get_cache()
+    cache.delete(SNAPSHOT_KEY.format(user_id))
+    cache.set(
+        REVOKED_KEY.format(user_id), time.time(),
+        settings.JWT_USER_CACHE_TIMEOUT
+    )
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса к базе на каждый запрос к API.
+
+    Пользователь собирается из утверждений токена, если токен выдан не
+    раньше `JWT_USER_CACHE_TIMEOUT` секунд назад и после последнего
+    изменения пользователя, иначе — из снимка полей в кэше с тем же
+    временем жизни. Изменение пользователя (см. api/signals.py) отзывает
+    утверждения и снимок; при кэше в памяти процесса другие процессы
+    увидят изменение не позже чем через `JWT_USER_CACHE_TIMEOUT` секунд.
+
+    Возвращаемый пользователь содержит только поля SNAPSHOT_FIELDS.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        data = (
+            self.get_claims_data(validated_token, user_id)
+            or self.get_snapshot_data(user_id)
+        )
+        if data is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not data['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        user = User(**data)
+        user._state.adding = False
+        user._state.db = User.objects.db
+        return user
+
+    @staticmethod
+    def get_claims_data(token, user_id):
+        issued_at = token.payload.get(ISSUED_AT_CLAIM)
+        if (issued_at is None
+                or time.time() - issued_at > settings.JWT_USER_CACHE_TIMEOUT
+                or any(claim not in token.payload for claim in USER_CLAIMS)):
+            return None
+        revoked_at = get_cache().get(REVOKED_KEY.format(user_id))
+        if revoked_at is not None and issued_at <= revoked_at:
+            return None
+        data = {claim: token[claim] for claim in USER_CLAIMS}
+        data.update(id=user_id, is_active=True)
+        return data
+
+    @staticmethod
+    def get_snapshot_data(user_id):
+        cache = get_cache()
+        key = SNAPSHOT_KEY.format(user_id)
+        data = cache.get(key)
+        if data is None:
+            data = User.objects.filter(pk=user_id).values(
+                *SNAPSHOT_FIELDS
+            ).first()
+            if data is not None:
+                cache.set(key, data, settings.JWT_USER_CACHE_TIMEOUT)
+        return data
@@ -0,0 +1,238 @@
+# api/bulk.py
+
+from collections import Counter
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from reviews.models import Category, Genre, Title
+
+from .cache import TITLES, bump_versions, title_namespace
+
+BULK_LIST_MESSAGE = _('Ожидается список объектов.')
+BULK_SIZE_MESSAGE = _('Не больше {} объектов за запрос.')
+DUPLICATE_MESSAGE = _('Значение повторяется в запросе.')
+EXISTS_MESSAGE = _('Объект с таким значением уже существует.')
+NOT_FOUND_MESSAGE = _('Объект не найден.')
+REQUIRED_MESSAGE = _('Обязательное поле.')
+
+
+class BulkWriteMixin:
+    """Создание (POST) и изменение (PATCH) списка объектов на `bulk/`.
+
+    Запрос выполняется целиком или не выполняется: при ошибках
+    возвращается список ошибок по позициям входного списка. Модели
+    сохраняются через bulk_create и bulk_update, поэтому сигналы не
+    отправляются и версии кэша увеличиваются здесь.
+    """
+    bulk_serializer_class = None
+    bulk_lookup_field = 'slug'
+    bulk_max_items = 1000
+    bulk_cache_namespaces = ()
+
+    @action(methods=['post', 'patch'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: [BULK_LIST_MESSAGE]}
+            )
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                BULK_SIZE_MESSAGE.format(self.bulk_max_items)
+            ]})
+        partial = request.method == 'PATCH'
+        errors = [{} for _ in items]
+        if partial:
+            instances = self.get_bulk_instances(items, errors)
+        else:
+            instances = [None] * len(items)
+        data = []
+        for index, (item, instance) in enumerate(zip(items, instances)):
+            serializer = self.bulk_serializer_class(
+                instance, data=item, partial=partial
+            )
+            if serializer.is_valid():
+                data.append(dict(serializer.validated_data))
+            else:
+                errors[index].update(serializer.errors)
+                data.append(None)
+        self.validate_bulk(data, instances, errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if partial:
+                objects = self.perform_bulk_update(data, instances)
+            else:
+                objects = self.perform_bulk_create(data)
+            bump_versions(*self.get_bulk_cache_namespaces(objects))
+        return Response(
+            self.get_bulk_response_data(objects),
+            status=status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+        )
+
+    def get_bulk_instances(self, items, errors):
+        """Изменяемые объекты одним запросом по `bulk_lookup_field`."""
+        model = self.get_queryset().model
+        field = model._meta.get_field(self.bulk_lookup_field)
+        keys = []
+        for index, item in enumerate(items):
+            key = None
+            if isinstance(item, dict) and item.get(field.name) is not None:
+                try:
+                    key = field.to_python(item[field.name])
+                except DjangoValidationError as error:
+                    errors[index][field.name] = error.messages
+            elif isinstance(item, dict):
+                errors[index][field.name] = [REQUIRED_MESSAGE]
+            keys.append(key)
+        counts = Counter(key for key in keys if key is not None)
+        found = model._default_manager.in_bulk(
+            list(counts), field_name=field.name
+        )
+        instances = []
+        for index, key in enumerate(keys):
+            if key is not None and counts[key] > 1:
+                errors[index][field.name] = [DUPLICATE_MESSAGE]
+            elif key is not None and key not in found:
+                errors[index][field.name] = [NOT_FOUND_MESSAGE]
+            instances.append(found.get(key))
+        return instances
+
+    def validate_bulk(self, data, instances, errors):
+        """Проверки, требующие запросов к базе, — по одному на список."""
+
+    def perform_bulk_create(self, data):
+        model = self.get_queryset().model
+        return model._default_manager.bulk_create(
+            model(**item) for item in data
+        )
+
+    def perform_bulk_update(self, data, instances):
+        fields = set()
+        for item, instance in zip(data, instances):
+            for name, value in item.items():
+                setattr(instance, name, value)
+            fields.update(item)
+        fields.discard(self.bulk_lookup_field)
+        if fields:
+            self.get_queryset().model._default_manager.bulk_update(
+                instances, sorted(fields)
+            )
+        return instances
+
+    def get_bulk_cache_namespaces(self, objects):
+        return self.bulk_cache_namespaces
+
+    def get_bulk_response_data(self, objects):
+        return self.bulk_serializer_class(objects, many=True).data
+
+
+class SlugBulkWriteMixin(BulkWriteMixin):
+    """Массовая запись жанров и категорий: slug создаваемых уникален."""
+
+    def validate_bulk(self, data, instances, errors):
+        if self.request.method == 'PATCH':
+            return
+        slugs = Counter(item['slug'] for item in data if item)
+        existing = set(
+            self.get_queryset().model._default_manager.filter(
+                slug__in=list(slugs)
+            ).values_list('slug', flat=True)
+        )
+        for index, item in enumerate(data):
+            if not item:
+                continue
+            if slugs[item['slug']] > 1:
+                errors[index]['slug'] = [DUPLICATE_MESSAGE]
+            elif item['slug'] in existing:
+                errors[index]['slug'] = [EXISTS_MESSAGE]
+
+
+class TitleBulkWriteMixin(BulkWriteMixin):
+    """Массовая запись произведений с жанрами и категорией по slug."""
+    bulk_lookup_field = 'id'
+
+    def validate_bulk(self, data, instances, errors):
+        categories = Category.objects.in_bulk(
+            {
+                item['category'] for item in data
+                if item and 'category' in item
+            },
+            field_name='slug'
+        )
+        genres = Genre.objects.in_bulk(
+            {
+                slug for item in data if item and 'genre' in item
+                for slug in item['genre']
+            },
+            field_name='slug'
+        )
+        for index, item in enumerate(data):
+            if not item:
+                continue
+            if 'category' in item:
+                if item['category'] in categories:
+                    item['category'] = categories[item['category']]
+                else:
+                    errors[index]['category'] = [NOT_FOUND_MESSAGE]
+            if 'genre' in item:
+                missing = [
+                    slug for slug in item['genre'] if slug not in genres
+                ]
+                if missing:
+                    errors[index]['genre'] = [
+                        f'{NOT_FOUND_MESSAGE} {", ".join(missing)}'
+                    ]
+                else:
+                    item['genre'] = [genres[slug] for slug in item['genre']]
+
+    def perform_bulk_create(self, data):
+        genres = [item.pop('genre', []) for item in data]
+        titles = [Title(**item) for item in data]
+        features = connections[Title.objects.db].features
+        if features.can_return_ids_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+        else:
+            for title in titles:
+                title.save()
+        self.set_genres(zip(titles, genres))
+        return titles
+
+    def perform_bulk_update(self, data, instances):
+        genres = [
+            (instance, item.pop('genre'))
+            for item, instance in zip(data, instances) if 'genre' in item
+        ]
+        Title.genre.through.objects.filter(
+            title__in=[title for title, _ in genres]
+        ).delete()
+        self.set_genres(genres)
+        return super().perform_bulk_update(data, instances)
+
+    @staticmethod
+    def set_genres(title_genres):
+        through = Title.genre.through
+        through.objects.bulk_create(
+            through(title=title, genre=genre)
+            for title, genres in title_genres
+            for genre in dict.fromkeys(genres)
+        )
+
+    def get_bulk_cache_namespaces(self, objects):
+        return (TITLES,) + tuple(
+            title_namespace(title.pk) for title in objects
+        )
+
+    def get_bulk_response_data(self, objects):
+        titles = self.get_queryset().filter(
+            pk__in=[title.pk for title in objects]
+        ).order_by('pk')
+        return self.get_serializer_class()(titles, many=True).data
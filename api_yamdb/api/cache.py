@@ -0,0 +1,149 @@
+# api/cache.py
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from reviews.models import BULK_CHANGES, DataVersion
+
+STATS_KEY = 'api:cache:{}:{}'
+
+HIT = 'hit'
+MISS = 'miss'
+
+CATEGORIES = 'categories'
+GENRES = 'genres'
+TITLES = 'titles'
+# Рейтинги произведений в списке: отзывы меняют их, но не описание
+# произведений (индекс поиска, см. api/search.py).
+RATINGS = 'ratings'
+USERS = 'users'
+# Поля пользователей, которые выводятся в отзывах и комментариях.
+AUTHORS = 'authors'
+
+
+def title_namespace(title_id):
+    """Произведение, его отзывы и рейтинг."""
+    return f'title:{title_id}'
+
+
+def review_namespace(review_id):
+    """Комментарии к отзыву."""
+    return f'review:{review_id}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_versions(*namespaces):
+    """Версии пространств имён и версия массовых изменений.
+
+    Версии хранятся в базе (reviews.DataVersion) и общие для всех
+    процессов, а читаются через кэш: ответ из кэша не обращается
+    к базе. Пространство имён без версии ещё не изменялось.
+    """
+    namespaces = (*namespaces, BULK_CHANGES)
+    versions = DataVersion.objects.get_versions(namespaces)
+    return [versions[namespace] for namespace in namespaces]
+
+
+def bump_versions(*namespaces):
+    """Делает недействительными ответы, закэшированные в namespaces.
+
+    Вызывается в транзакции, изменяющей данные: версии увеличиваются
+    после её фиксации.
+    """
+    DataVersion.objects.bump(*namespaces)
+
+
+class VersionsMixin:
+    """Версии пространств имён, прочитанные один раз за запрос."""
+
+    def get_namespace_versions(self, namespaces):
+        if not hasattr(self, '_namespace_versions'):
+            self._namespace_versions = {}
+        namespaces = tuple(namespaces)
+        if namespaces not in self._namespace_versions:
+            self._namespace_versions[namespaces] = get_versions(*namespaces)
+        return self._namespace_versions[namespaces]
+
+
+def record(namespace, event):
+    cache = get_cache()
+    key = STATS_KEY.format(namespace, event)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats(namespaces):
+    """Счётчики попаданий и промахов по пространствам имён."""
+    cache = get_cache()
+    keys = {
+        (namespace, event): STATS_KEY.format(namespace, event)
+        for namespace in namespaces
+        for event in (HIT, MISS)
+    }
+    values = cache.get_many(keys.values())
+    return {
+        namespace: {
+            event: values.get(keys[namespace, event], 0)
+            for event in (HIT, MISS)
+        }
+        for namespace in namespaces
+    }
+
+
+class CachedReadMixin(VersionsMixin):
+    """Кэширует сериализованные ответы list и retrieve.
+
+    Ключ строится из пути, отсортированных параметров запроса и версий
+    `cache_namespaces`; версии увеличиваются сигналами при изменении
+    данных (см. api/signals.py) и командами массовой загрузки.
+    """
+    cache_namespace = None
+    cache_namespaces = ()
+    cache_anonymous_only = False
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cache_key(self, request):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        versions = self.get_namespace_versions(self.cache_namespaces)
+        raw_key = f'{request.path}?{query}:{versions}'
+        return (
+            f'api:response:{self.cache_namespace}:'
+            f'{hashlib.md5(raw_key.encode("utf-8")).hexdigest()}'
+        )
+
+    def get_cached_response(self, method, request, *args, **kwargs):
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return method(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record(self.cache_namespace, HIT)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record(self.cache_namespace, MISS)
+        response = method(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,67 @@
+# api/conditional.py
+
+import hashlib
+import math
+import time
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, urlencode
+
+from .cache import VersionsMixin
+
+
+class ConditionalGetMixin(VersionsMixin):
+    """ETag и Last-Modified для GET-запросов без сериализации ответа.
+
+    Оба заголовка вычисляются по версиям пространств имён кэша
+    (см. api/cache.py), поэтому на `If-None-Match` и
+    `If-Modified-Since` ответ 304 отдаётся после одного запроса версий.
+    """
+    etag_namespaces = ()
+    etag_per_user = False
+
+    def get_etag_namespaces(self):
+        return self.etag_namespaces
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validators(self, request):
+        versions = self.get_namespace_versions(self.get_etag_namespaces())
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        raw_etag = (
+            f'{request.path}?{query}:{request.accepted_renderer.format}:'
+            f'{versions}'
+        )
+        if self.etag_per_user:
+            raw_etag += f':{request.user.pk}'
+        etag = f'"{hashlib.sha1(raw_etag.encode("utf-8")).hexdigest()}"'
+        # Last-Modified имеет точность в секунду: дата отдаётся, только
+        # когда секунда последнего изменения уже закончилась, иначе
+        # следующее изменение в ту же секунду не изменило бы дату.
+        last_modified = math.ceil(max(versions))
+        if not last_modified or last_modified > time.time():
+            last_modified = None
+        return etag, last_modified
+
+    def get_conditional_response(self, method, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = method(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            if self.etag_per_user:
+                patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,39 @@
+# api/export.py
+
+import os
+
+from django.conf import settings
+
+from reviews.management.commands.data_import import data_files_list
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+# Наборы данных называются как файлы команды data_import, столбцы
+# совпадают с заголовками этих файлов: выгрузку можно загрузить обратно.
+EXPORT_DATASETS = {
+    os.path.splitext(file)[0]: model for file, model in data_files_list
+}
+
+EXPORT_COLUMNS = {
+    User: (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name',
+    ),
+    Category: ('id', 'name', 'slug'),
+    Genre: ('id', 'name', 'slug'),
+    Title: ('id', 'name', 'year', 'description', 'category', 'rating'),
+    Title.genre.through: ('id', 'title_id', 'genre_id'),
+    Review: ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    Comment: ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+
+
+def get_export_rows(model):
+    """Заголовок и строки набора данных без загрузки таблицы в память.
+
+    В PostgreSQL iterator() читает строки курсором на стороне сервера.
+    """
+    header = EXPORT_COLUMNS[model]
+    attnames = [model._meta.get_field(name).attname for name in header]
+    rows = model._default_manager.order_by('pk').values_list(
+        *attnames
+    ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    return header, rows
@@ -0,0 +1,124 @@
+# api/fieldsets.py
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+UNKNOWN_FIELDS_MESSAGE = _('Неизвестные поля: {}.')
+
+
+def get_related_columns(field):
+    """Поля связанной модели, которые выводит поле сериализатора.
+
+    None означает, что набор полей определить нельзя.
+    """
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.ManyRelatedField):
+        field = field.child_relation
+    if isinstance(field, serializers.SlugRelatedField):
+        return [field.slug_field]
+    if not isinstance(field, serializers.BaseSerializer):
+        return None
+    columns = [subfield.source for subfield in field.fields.values()]
+    if any('.' in column or column == '*' for column in columns):
+        return None
+    return columns
+
+
+class SparseFieldsetMixin:
+    """Состав ответа по параметрам `fields` и `expand` запроса.
+
+    `fields=id,name` оставляет в ответе только перечисленные поля,
+    `expand=author` разворачивает поля из `Meta.expandable_fields`
+    сериализатора (см. MixinSparseFieldsetSerializer). При чтении запрос
+    к базе сужается под выводимые поля: only() для столбцов,
+    select_related и prefetch_related только для выводимых связей.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def is_sparse_request(self):
+        return self.request.method in ('GET', 'HEAD')
+
+    def get_fieldset(self):
+        if not hasattr(self, '_fieldset'):
+            meta = self.get_serializer_class().Meta
+            self._fieldset = (
+                self.parse_fieldset(self.fields_query_param, meta.fields),
+                self.parse_fieldset(
+                    self.expand_query_param,
+                    getattr(meta, 'expandable_fields', {})
+                ) or set(),
+            )
+        return self._fieldset
+
+    def parse_fieldset(self, param, allowed):
+        value = self.request.query_params.get(param)
+        if not value:
+            return None
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names.difference(allowed)
+        if unknown:
+            raise ValidationError({param: [
+                UNKNOWN_FIELDS_MESSAGE.format(', '.join(sorted(unknown)))
+            ]})
+        return names
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.is_sparse_request():
+            fields, expand = self.get_fieldset()
+            context.update(sparse_fields=fields, expand_fields=expand)
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.is_sparse_request():
+            return self.narrow_queryset(queryset)
+        return queryset
+
+    def narrow_queryset(self, queryset):
+        """Запрос, читающий только поля, которые выведет сериализатор."""
+        model = queryset.model
+        columns = {model._meta.pk.name}
+        # Значения полей курсора читаются из последнего объекта страницы.
+        columns.update(
+            name.lstrip('-') for name in getattr(self, 'keyset_ordering', ())
+        )
+        # Запрос из связанного менеджера (title.reviews) читает внешний
+        # ключ каждой строки, чтобы подставить известный родительский объект.
+        columns.update(
+            field.name for field in queryset._known_related_objects
+        )
+        select_related = []
+        prefetch_related = []
+        for field in self.get_serializer().fields.values():
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return queryset
+            related_columns = get_related_columns(field)
+            if model_field.many_to_many or model_field.one_to_many:
+                related = model_field.related_model._default_manager.all()
+                if model_field.many_to_many and related_columns:
+                    related = related.only(*related_columns)
+                prefetch_related.append(
+                    Prefetch(model_field.name, queryset=related)
+                )
+                continue
+            columns.add(model_field.name)
+            if model_field.is_relation and not isinstance(
+                field, serializers.PrimaryKeyRelatedField
+            ):
+                select_related.append(model_field.name)
+                columns.update(
+                    f'{model_field.name}__{column}'
+                    for column in related_columns or ()
+                )
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        return queryset.prefetch_related(*prefetch_related).only(*columns)
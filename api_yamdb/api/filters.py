@@ -1,16 +1,147 @@
 # api/filter.py
 
 import django_filters as filters
+from django.db import connections
+from django.db.models import Case, F, FloatField, Subquery, Value, When
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
 
-from reviews.models import Title
+from reviews.models import Category, Genre, Title
+
+from .search import get_title_index
+
+GENRE_MODE_ANY = 'any'
+GENRE_MODE_ALL = 'all'
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(field_name='genre__slug')
-    category = filters.CharFilter(field_name='category__slug')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=((GENRE_MODE_ANY, _('Любой из жанров')),
+                 (GENRE_MODE_ALL, _('Все жанры'))),
+        method='filter_genre_mode',
+    )
+    category = filters.CharFilter(method='filter_category')
     year = filters.NumberFilter(field_name='year')
     name = filters.CharFilter(field_name='name', lookup_expr='contains')
+    rating_min = filters.NumberFilter(field_name='rating', lookup_expr='gte')
+    rating_max = filters.NumberFilter(field_name='rating', lookup_expr='lte')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = ('category', 'genre', 'genre_mode', 'name', 'year',
+                  'rating_min', 'rating_max')
+
+    # Идентификаторы по slug вычисляются отдельными подзапросами, а не
+    # соединением: тогда планировщик читает произведения по индексам
+    # (category, name, id) и (genre_id, title_id).
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(category_id=Subquery(
+            Category.objects.filter(slug=value).order_by().values('id')[:1]
+        ))
+
+    # Жанры проверяются полусоединениями `id IN (...)`: строки
+    # произведений не размножаются при нескольких жанрах.
+
+    def filter_genre(self, queryset, name, value):
+        slugs = list(dict.fromkeys(
+            slug.strip() for slug in value.split(',') if slug.strip()
+        ))
+        if not slugs:
+            return queryset
+        titles = Title.genre.through.objects.order_by().values('title_id')
+        if self.form.cleaned_data.get('genre_mode') == GENRE_MODE_ALL:
+            for slug in slugs:
+                queryset = queryset.filter(pk__in=titles.filter(
+                    genre_id=Subquery(
+                        Genre.objects.filter(
+                            slug=slug
+                        ).order_by().values('id')[:1]
+                    )
+                ))
+            return queryset
+        return queryset.filter(pk__in=titles.filter(
+            genre_id__in=Genre.objects.filter(
+                slug__in=slugs
+            ).order_by().values('id')
+        ))
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Режим учитывается в filter_genre.
+        return queryset
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """Сортировка произведений; без оценок — всегда в конце.
+
+    `ordering=-rating` читает произведения по индексу title_rating_idx
+    (rating DESC NULLS LAST, id DESC), см. миграцию reviews.0005.
+    """
+    nulls_last_fields = ('rating',)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering or not any(
+            term.lstrip('-') in self.nulls_last_fields for term in ordering
+        ):
+            return ordering
+        result = []
+        for term in ordering:
+            field = term.lstrip('-')
+            if field not in self.nulls_last_fields:
+                result.append(term)
+            elif term.startswith('-'):
+                result.append(F(field).desc(nulls_last=True))
+            else:
+                result.append(F(field).asc(nulls_last=True))
+        # Равные рейтинги упорядочиваются по id, как в индексе.
+        if not {'id', '-id', 'pk', '-pk'}.intersection(ordering):
+            result.append('-id' if ordering[-1].startswith('-') else 'id')
+        return result
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск по названию и описанию произведений.
+
+    В PostgreSQL используется индексированная колонка search_vector
+    (миграция reviews.0003), на других базах — индекс в памяти.
+    Без параметра ordering результаты сортируются по релевантности.
+    """
+    search_param = api_settings.SEARCH_PARAM
+    config = 'pg_catalog.russian'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        if connections[queryset.db].vendor == 'postgresql':
+            queryset = self.search_postgresql(queryset, query)
+        else:
+            queryset = self.search_python(queryset, query)
+        if api_settings.ORDERING_PARAM in request.query_params:
+            return queryset
+        return queryset.order_by('-search_rank', 'pk')
+
+    def search_postgresql(self, queryset, query):
+        table = connections[queryset.db].ops.quote_name(
+            queryset.model._meta.db_table
+        )
+        vector = f'{table}.search_vector'
+        tsquery = f"plainto_tsquery('{self.config}', %s)"
+        return queryset.extra(
+            select={'search_rank': f'ts_rank({vector}, {tsquery})'},
+            select_params=(query,),
+            where=[f'{vector} @@ {tsquery}'],
+            params=(query,),
+        )
+
+    @staticmethod
+    def search_python(queryset, query):
+        ranks = get_title_index(queryset).search(query)
+        return queryset.filter(pk__in=ranks).annotate(search_rank=Case(
+            *(When(pk=pk, then=Value(rank)) for pk, rank in ranks.items()),
+            default=Value(0.0),
+            output_field=FloatField(),
+        ))
@@ -0,0 +1,28 @@
+# api/locking.py
+
+from django.db import transaction
+
+
+class RowLockMixin:
+    """Блокирует изменяемый и удаляемый объект до конца запроса.
+
+    Счётчики произведения меняются на разницу со старыми значениями
+    объекта, поэтому параллельные изменения одного объекта выполняются
+    по очереди: второй запрос читает объект после фиксации первого,
+    а удалённый объект уже не находит (404).
+    """
+    lock_actions = ('update', 'partial_update', 'destroy')
+
+    def lock_for_write(self, queryset):
+        if self.action in self.lock_actions:
+            # of: связанные через select_related строки не блокируются.
+            return queryset.select_for_update(of=('self',))
+        return queryset
+
+    @transaction.atomic
+    def update(self, request, *args, **kwargs):
+        return super().update(request, *args, **kwargs)
+
+    @transaction.atomic
+    def destroy(self, request, *args, **kwargs):
+        return super().destroy(request, *args, **kwargs)
@@ -0,0 +1,110 @@
+# api/mail.py
+
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueue:
+    """Фоновая отправка писем пачками через одно соединение.
+
+    Письма отправляются потоком процесса: запрос не ждёт почтовый сервер.
+    Пока отправляется пачка, новые письма копятся в очереди и уходят
+    следующей пачкой. Неотправленное письмо повторяется с экспоненциальной
+    задержкой, после `EMAIL_RETRIES` неудач оно записывается в журнал
+    и пропускается.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def put(self, message):
+        if not settings.EMAIL_ASYNC:
+            message.send()
+            return
+        self.queue.put(message)
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='mail-queue', daemon=True
+                )
+                self.thread.start()
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < settings.EMAIL_BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.deliver(batch)
+            except Exception:
+                logger.exception('Ошибка отправки %s писем', len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def deliver(self, messages):
+        connection = get_connection()
+        pending = list(messages)
+        failures = 0
+        while pending:
+            try:
+                connection.open()
+                while pending:
+                    connection.send_messages(pending[:1])
+                    pending.pop(0)
+                    failures = 0
+            except Exception:
+                failures += 1
+                self.close(connection)
+                if failures > settings.EMAIL_RETRIES:
+                    logger.exception(
+                        'Письмо для %s не отправлено', pending[0].to
+                    )
+                    pending.pop(0)
+                    failures = 0
+                else:
+                    time.sleep(
+                        settings.EMAIL_RETRY_BACKOFF * 2 ** (failures - 1)
+                    )
+        self.close(connection)
+
+    @staticmethod
+    def close(connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.exception('Ошибка закрытия почтового соединения')
+
+    def flush(self, timeout=None):
+        """Ждёт отправки писем из очереди; возвращает False по таймауту."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+mail_queue = MailQueue()
+atexit.register(lambda: mail_queue.flush(settings.EMAIL_FLUSH_TIMEOUT))
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Аналог send_mail, не ожидающий отправки письма."""
+    mail_queue.put(EmailMessage(
+        subject=subject, body=message, from_email=from_email,
+        to=recipient_list,
+    ))
@@ -0,0 +1,212 @@
+# api/middleware.py
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from .cache import CATEGORIES, GENRES, TITLES, get_cache_stats
+
+logger = logging.getLogger(__name__)
+
+SECONDS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304,
+)
+CACHE_NAMESPACES = (CATEGORIES, GENRES, TITLES)
+
+
+class Histogram:
+    """Накопительная гистограмма в формате Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics:
+    """Гистограммы запросов по представлениям в памяти процесса."""
+    histograms = {
+        'request_duration_seconds': (
+            'Время обработки запроса', SECONDS_BUCKETS
+        ),
+        'db_queries': ('Число SQL-запросов на запрос', QUERIES_BUCKETS),
+        'db_duration_seconds': (
+            'Время SQL-запросов на запрос', SECONDS_BUCKETS
+        ),
+        'render_duration_seconds': (
+            'Время сериализации ответа в JSON', SECONDS_BUCKETS
+        ),
+        'response_size_bytes': ('Размер тела ответа', BYTES_BUCKETS),
+    }
+
+    def __init__(self, prefix='yamdb'):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.data = {}
+
+    def observe(self, view, values):
+        with self.lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                key = (name, view)
+                if key not in self.data:
+                    self.data[key] = Histogram(self.histograms[name][1])
+                self.data[key].observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def export(self):
+        """Текст метрик в формате Prometheus exposition 0.0.4."""
+        lines = []
+        with self.lock:
+            for name, (help_text, _buckets) in self.histograms.items():
+                metric = f'{self.prefix}_{name}'
+                lines.append(f'# HELP {metric} {help_text}')
+                lines.append(f'# TYPE {metric} histogram')
+                for (key, view), histogram in sorted(self.data.items()):
+                    if key != name:
+                        continue
+                    label = f'view="{view}"'
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f'{metric}_bucket{{{label},le="{bound}"}} {count}'
+                        )
+                    lines.append(f'{metric}_sum{{{label}}} {histogram.sum}')
+                    lines.append(
+                        f'{metric}_count{{{label}}} {histogram.count}'
+                    )
+        metric = f'{self.prefix}_cache_requests_total'
+        lines.append(f'# HELP {metric} Обращения к кэшу ответов API')
+        lines.append(f'# TYPE {metric} counter')
+        for namespace, events in get_cache_stats(CACHE_NAMESPACES).items():
+            for event, count in events.items():
+                lines.append(
+                    f'{metric}{{namespace="{namespace}",result="{event}"}} '
+                    f'{count}'
+                )
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class QueryRecorder:
+    """execute_wrapper, считающий SQL-запросы и их время."""
+
+    def __init__(self, keep_sql):
+        self.keep_sql = keep_sql
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if self.keep_sql:
+                self.queries.append((duration, sql))
+
+
+class PerformanceMiddleware:
+    """Время, SQL-запросы и размер ответа каждого запроса.
+
+    Добавляет заголовок `Server-Timing`, накапливает гистограммы по
+    представлениям (см. MetricsView) и записывает в журнал SQL запросов
+    дольше `SLOW_REQUEST_THRESHOLD` секунд. Запросы к базе из потоковых
+    ответов выполняются после middleware и не учитываются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        threshold = settings.SLOW_REQUEST_THRESHOLD
+        recorder = QueryRecorder(keep_sql=threshold is not None)
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        render = getattr(request, '_render_duration', None)
+        size = None
+        if not response.streaming:
+            size = len(response.content)
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match is not None else 'unmatched'
+        metrics.observe(view, {
+            'request_duration_seconds': duration,
+            'db_queries': recorder.count,
+            'db_duration_seconds': recorder.duration,
+            'render_duration_seconds': render,
+            'response_size_bytes': size,
+        })
+        response['Server-Timing'] = self.get_server_timing(
+            duration, recorder, render
+        )
+        if threshold is not None and duration >= threshold:
+            self.log_slow_request(request, response, duration, recorder)
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответ DRF сериализуется в response.render() после этого вызова.
+        started = time.perf_counter()
+
+        def render_finished(response):
+            request._render_duration = time.perf_counter() - started
+
+        response.add_post_render_callback(render_finished)
+        return response
+
+    @staticmethod
+    def get_server_timing(duration, recorder, render):
+        timings = [
+            f'db;dur={recorder.duration * 1000:.2f};'
+            f'desc="{recorder.count} queries"'
+        ]
+        if render is not None:
+            timings.append(f'render;dur={render * 1000:.2f}')
+        timings.append(f'total;dur={duration * 1000:.2f}')
+        return ', '.join(timings)
+
+    @staticmethod
+    def log_slow_request(request, response, duration, recorder):
+        queries = '\n'.join(
+            f'  {query_duration * 1000:.2f} мс: {sql}'
+            for query_duration, sql in recorder.queries
+        )
+        logger.warning(
+            'Медленный запрос %s %s: %s, %.3f с, '
+            '%s SQL-запросов за %.3f с\n%s',
+            request.method, request.get_full_path(), response.status_code,
+            duration, recorder.count, recorder.duration, queries,
+        )
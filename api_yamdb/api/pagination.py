@@ -0,0 +1,168 @@
+# api/pagination.py
+
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.translation import ugettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+INVALID_CURSOR_MESSAGE = _('Неверный курсор.')
+KEYSET_PARAM_MESSAGE = _(
+    'Параметр нельзя использовать с постраничным выводом по курсору.'
+)
+
+
+class KeysetPagination(BasePagination):
+    """Постраничный вывод по ключу сортировки без COUNT и OFFSET.
+
+    Курсор хранит значения полей `view.keyset_ordering` для крайнего
+    элемента страницы; последнее поле должно быть уникальным. Параметры
+    из `view.keyset_incompatible_params` меняют порядок выдачи, поэтому
+    вместе с курсором они отклоняются.
+    """
+    page_size = PageNumberPagination.page_size
+    cursor_query_param = 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        params = [
+            param for param in getattr(view, 'keyset_incompatible_params', ())
+            if param in request.query_params
+        ]
+        if params:
+            raise ValidationError(
+                {param: [KEYSET_PARAM_MESSAGE] for param in params}
+            )
+        self.base_url = request.build_absolute_uri()
+        self.ordering = tuple(view.keyset_ordering)
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self.invert(name) for name in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(
+                ordering, position
+            ))
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    @staticmethod
+    def invert(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    @staticmethod
+    def get_position_filter(ordering, position):
+        """Лексикографическое сравнение `(f1, f2, ...) > (v1, v2, ...)`."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    @staticmethod
+    def get_item_value(item, field):
+        if isinstance(item, dict):
+            value = item[field.attname]
+        else:
+            value = getattr(item, field.attname)
+        if hasattr(value, 'isoformat'):
+            return value.isoformat()
+        return value
+
+    def encode_cursor(self, item, reverse):
+        payload = {
+            'p': [self.get_item_value(item, field) for field in self.fields]
+        }
+        if reverse:
+            payload['r'] = 1
+        cursor = b64encode(
+            json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')))
+            values = payload['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (BinasciiError, DjangoValidationError, KeyError, TypeError,
+                UnicodeError, ValueError):
+            raise NotFound(INVALID_CURSOR_MESSAGE)
+        return position, bool(payload.get('r'))
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """Номера страниц по умолчанию, курсор — по `?pagination=cursor`."""
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.keyset_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if (getattr(view, 'keyset_ordering', None)
+                and self.use_keyset(request)):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
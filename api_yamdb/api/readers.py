@@ -0,0 +1,149 @@
+# api/readers.py
+
+from collections import defaultdict
+
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from reviews.models import Title
+
+AUTHOR_COLUMNS = {
+    'username': 'author__username',
+    'first_name': 'author__first_name',
+    'last_name': 'author__last_name',
+    'bio': 'author__bio',
+}
+
+
+class ValuesReader:
+    """Представление списка из строк .values() без моделей и полей DRF.
+
+    Повторяет вывод сериализатора для чтения: `fields` сопоставляет полю
+    ответа столбец .values() или словарь вложенных полей, `converters` —
+    преобразование непустого значения.
+    """
+    fields = {}
+    expandable_fields = {}
+    converters = {}
+
+    def __init__(self, sparse_fields=None, expand_fields=()):
+        output = dict(self.fields)
+        for name in expand_fields:
+            output[name] = self.expandable_fields[name]
+        if sparse_fields is not None:
+            output = {
+                name: column for name, column in output.items()
+                if name in sparse_fields
+            }
+        self.output = output
+
+    def get_columns(self):
+        columns = []
+        for column in self.output.values():
+            if isinstance(column, dict):
+                columns.extend(column.values())
+            elif column is not None:
+                columns.append(column)
+        return columns
+
+    def to_representation(self, row):
+        data = {}
+        for name, column in self.output.items():
+            if isinstance(column, dict):
+                value = {key: row[nested] for key, nested in column.items()}
+                if all(nested is None for nested in value.values()):
+                    value = None
+            elif column is None:
+                value = None
+            else:
+                value = row[column]
+                if value is not None and name in self.converters:
+                    value = self.converters[name](value)
+            data[name] = value
+        return data
+
+    def read(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class TitleReader(ValuesReader):
+    """Вывод TitleGetSerializer; жанры читаются одним запросом."""
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'year': 'year',
+        'rating': 'rating',
+        'description': 'description',
+        'genre': None,
+        'category': {'name': 'category__name', 'slug': 'category__slug'},
+    }
+    converters = {'rating': int}
+
+    def read(self, rows):
+        data = super().read(rows)
+        if 'genre' not in self.output:
+            return data
+        genres = defaultdict(list)
+        for row in Title.genre.through.objects.filter(
+            title_id__in=[row['id'] for row in rows]
+        ).order_by('genre__name').values(
+            'title_id', 'genre__name', 'genre__slug'
+        ):
+            genres[row['title_id']].append(
+                {'name': row['genre__name'], 'slug': row['genre__slug']}
+            )
+        for row, item in zip(rows, data):
+            item['genre'] = genres[row['id']]
+        return data
+
+
+class ReviewReader(ValuesReader):
+    """Вывод ReviewSerializer."""
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'author': 'author__username',
+        'score': 'score',
+        'pub_date': 'pub_date',
+    }
+    expandable_fields = {'author': AUTHOR_COLUMNS}
+    converters = {'pub_date': serializers.DateTimeField().to_representation}
+
+
+class CommentReader(ValuesReader):
+    """Вывод CommentSerializer."""
+    fields = {
+        'id': 'id',
+        'text': 'text',
+        'author': 'author__username',
+        'pub_date': 'pub_date',
+    }
+    expandable_fields = {'author': AUTHOR_COLUMNS}
+    converters = {'pub_date': serializers.DateTimeField().to_representation}
+
+
+class ValuesListMixin:
+    """list() через `values_reader_class` вместо сериализатора.
+
+    Используется вместе с SparseFieldsetMixin, от которого берёт
+    параметры `fields` и `expand`.
+    """
+    values_reader_class = None
+
+    def list(self, request, *args, **kwargs):
+        if self.values_reader_class is None:
+            return super().list(request, *args, **kwargs)
+        reader = self.values_reader_class(*self.get_fieldset())
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = {queryset.model._meta.pk.name}
+        columns.update(
+            name.lstrip('-') for name in getattr(self, 'keyset_ordering', ())
+        )
+        columns.update(reader.get_columns())
+        queryset = queryset.select_related(None).prefetch_related(
+            None
+        ).values(*columns)
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(reader.read(list(queryset)))
+        return self.get_paginated_response(reader.read(page))
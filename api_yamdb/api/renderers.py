@@ -0,0 +1,128 @@
+# api/renderers.py
+
+import csv
+import io
+import json
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer на orjson, если библиотека установлена.
+
+    Значения, которых нет в JSON, и даты преобразует JSONEncoder DRF, а
+    U+2028 и U+2029 экранируются, как в JSONRenderer, так что ответ
+    содержит те же значения. Побайтно вывод может отличаться записью
+    чисел с порядком: `1e16` вместо `1e+16`. Форматированный вывод
+    с отступами, как и отсутствие orjson, обрабатывает JSONRenderer.
+    """
+    encoder = JSONEncoder()
+    # Допустимы в строках JSON, но не в JavaScript.
+    escapes = (
+        ('\u2028'.encode('utf-8'), b'\\u2028'),
+        ('\u2029'.encode('utf-8'), b'\\u2029'),
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or data is None or indent:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        for char, escaped in self.escapes:
+            ret = ret.replace(char, escaped)
+        return ret
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Текстовый формат метрик Prometheus."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = '\n'.join(
+                f'# {key}: {value}' for key, value in data.items()
+            )
+        return f'{data}'.encode(self.charset)
+
+
+class StreamingRenderer(BaseRenderer):
+    """Рендерер, который также отдаёт строки таблицы частями.
+
+    Подклассы определяют генератор `stream(header, rows)` частей ответа
+    для StreamingHttpResponse.
+    """
+    charset = 'utf-8'
+    rows_per_chunk = 500
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """JSON-объект на строку."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def dumps(self, data):
+        return json.dumps(data, cls=JSONEncoder, ensure_ascii=False) + '\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return self.dumps(data).encode(self.charset)
+
+    def stream(self, header, rows):
+        lines = []
+        for row in rows:
+            lines.append(self.dumps(dict(zip(header, row))))
+            if len(lines) >= self.rows_per_chunk:
+                yield ''.join(lines)
+                lines = []
+        if lines:
+            yield ''.join(lines)
+
+
+class CSVRenderer(StreamingRenderer):
+    """CSV с заголовком, совместимый с командой data_import."""
+    media_type = 'text/csv'
+    format = 'csv'
+    encoder = JSONEncoder()
+
+    def format_value(self, value):
+        if value is None:
+            return ''
+        if hasattr(value, 'isoformat'):
+            return self.encoder.default(value)
+        return value
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        return ''.join(self.stream(list(data), [data.values()])).encode(
+            self.charset
+        )
+
+    def stream(self, header, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(header)
+        for count, row in enumerate(rows, start=1):
+            writer.writerow([self.format_value(value) for value in row])
+            if count % self.rows_per_chunk == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
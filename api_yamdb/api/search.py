@@ -0,0 +1,98 @@
+# api/search.py
+
+import re
+import threading
+from collections import defaultdict
+
+from .cache import TITLES, get_versions
+
+WORD_RE = re.compile(r'\w+')
+MIN_STEM_LENGTH = 2
+
+# Веса совпадают с весами A и B функции ts_rank в PostgreSQL.
+NAME_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+
+STOP_WORDS = frozenset((
+    'а', 'в', 'во', 'для', 'до', 'же', 'за', 'и', 'из', 'или', 'к', 'ко',
+    'ли', 'на', 'не', 'но', 'о', 'об', 'от', 'по', 'с', 'со', 'у',
+))
+REFLEXIVE_ENDINGS = ('ся', 'сь')
+ENDINGS = tuple(sorted((
+    'иями', 'ями', 'ами', 'ыми', 'ими', 'его', 'ого', 'ему', 'ому', 'иях',
+    'ием', 'иям', 'ией', 'ешь', 'ете', 'ить', 'ать', 'ять', 'еть',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ую', 'юю', 'ою', 'ею', 'ый', 'ий',
+    'ой', 'ей', 'ым', 'им', 'ом', 'ем', 'ам', 'ям', 'ах', 'ях', 'ых', 'их',
+    'ов', 'ев', 'ия', 'ья', 'ию', 'ью', 'ии', 'ье', 'ла', 'ли', 'ло', 'ть',
+    'а', 'е', 'и', 'й', 'о', 'у', 'ы', 'ь', 'ю', 'я',
+), key=len, reverse=True))
+
+
+def strip_ending(word, endings):
+    for ending in endings:
+        if (word.endswith(ending)
+                and len(word) - len(ending) >= MIN_STEM_LENGTH):
+            return word[:-len(ending)]
+    return word
+
+
+def stem(word):
+    """Упрощённый стеммер русского языка: отбрасывает окончание."""
+    word = word.lower().replace('ё', 'е')
+    return strip_ending(strip_ending(word, REFLEXIVE_ENDINGS), ENDINGS)
+
+
+def analyze(text):
+    """Основы слов текста без стоп-слов."""
+    return [
+        stem(word) for word in WORD_RE.findall(text.lower())
+        if word not in STOP_WORDS
+    ]
+
+
+class TitleSearchIndex:
+    """Инвертированный индекс названий и описаний произведений."""
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        for pk, name, description in rows:
+            for text, weight in ((name, NAME_WEIGHT),
+                                 (description, DESCRIPTION_WEIGHT)):
+                for term in analyze(text or ''):
+                    postings = self.postings[term]
+                    postings[pk] = postings.get(pk, 0) + weight
+
+    def search(self, query):
+        """Ранги произведений, содержащих все слова запроса."""
+        ranks = None
+        for term in set(analyze(query)):
+            postings = self.postings.get(term, {})
+            if ranks is None:
+                ranks = dict(postings)
+            else:
+                ranks = {
+                    pk: rank + postings[pk]
+                    for pk, rank in ranks.items() if pk in postings
+                }
+            if not ranks:
+                break
+        return ranks or {}
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_title_index(queryset):
+    """Индекс произведений, перестраиваемый при изменении версии TITLES."""
+    version = get_versions(TITLES)
+    with _lock:
+        cached = _indexes.get(queryset.db)
+        if cached is None or cached[0] != version:
+            rows = queryset.model._default_manager.using(
+                queryset.db
+            ).values_list('pk', 'name', 'description')
+            cached = _indexes[queryset.db] = (
+                version, TitleSearchIndex(rows.iterator())
+            )
+    return cached[1]
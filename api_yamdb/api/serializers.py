@@ -1,14 +1,53 @@
 # api/serialiser.py
 
+import copy
+
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import serializers
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    Category, Comment, Genre, RatingSummary, Review, SimilarTitle, Title,
+    TitleStats, User,
+)
 from reviews.validators import validate_username
 
+# Повторный отзыв отклоняет ограничение `unique review`, см. ReviewViewSet.
+REVIEW_EXISTS_MESSAGE = _('Вы уже написали отзыв к этому произведению.')
+
+
+class MixinSparseFieldsetSerializer:
+    """Поля из контекста `sparse_fields` и `expand_fields`.
+
+    Контекст заполняет SparseFieldsetMixin (см. api/fieldsets.py); поля
+    вложенных сериализаторов не меняются.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        if parent is not None:
+            return fields
+        for name in self.context.get('expand_fields', ()):
+            fields[name] = copy.deepcopy(self.Meta.expandable_fields[name])
+        sparse_fields = self.context.get('sparse_fields')
+        if sparse_fields is not None:
+            for name in set(fields).difference(sparse_fields):
+                del fields[name]
+        return fields
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = User
+        fields = ('username', 'first_name', 'last_name', 'bio')
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class CommentSerializer(MixinSparseFieldsetSerializer,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
@@ -16,9 +55,11 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'text', 'author', 'pub_date')
+        expandable_fields = {'author': AuthorSerializer(read_only=True)}
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(MixinSparseFieldsetSerializer,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
     )
@@ -27,33 +68,25 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = ('id', 'text', 'author', 'score', 'pub_date')
-
-    def validate(self, data):
-        if self.context['request'].method != 'POST':
-            return data
-
-        title_id = self.context['view'].kwargs.get('title_id')
-        author = self.context['request'].user
-        if Review.objects.filter(author=author, title=title_id).exists():
-            raise serializers.ValidationError(
-                _('Вы уже написали отзыв к этому произведению.')
-            )
-        return data
+        expandable_fields = {'author': AuthorSerializer(read_only=True)}
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(MixinSparseFieldsetSerializer,
+                         serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ('name', 'slug')
 
 
-class GenreSerializer(serializers.ModelSerializer):
+class GenreSerializer(MixinSparseFieldsetSerializer,
+                      serializers.ModelSerializer):
     class Meta:
         model = Genre
         fields = ('name', 'slug')
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class TitleGetSerializer(MixinSparseFieldsetSerializer,
+                         serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     genre = GenreSerializer(read_only=True, many=True)
     rating = serializers.IntegerField(read_only=True)
@@ -81,6 +114,61 @@ class TitleCreateSerializer(serializers.ModelSerializer):
         )
 
 
+class TitleStatsSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='title_id')
+    rating = serializers.IntegerField(source='title.rating')
+    scores = serializers.DictField(child=serializers.IntegerField())
+
+    class Meta:
+        model = TitleStats
+        fields = (
+            'id', 'rating', 'review_count', 'comment_count', 'scores',
+            'updated_at'
+        )
+        read_only_fields = fields
+
+
+class SimilarTitleSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='similar_id')
+    name = serializers.CharField(source='similar.name')
+    year = serializers.IntegerField(source='similar.year')
+
+    class Meta:
+        model = SimilarTitle
+        fields = ('id', 'name', 'year', 'score')
+        read_only_fields = fields
+
+
+class RatingSummarySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = RatingSummary
+        fields = (
+            'key', 'name', 'title_count', 'rated_title_count',
+            'review_count', 'average_rating'
+        )
+        read_only_fields = fields
+
+
+class BulkCategorySerializer(CategorySerializer):
+    # Уникальность slug проверяется одним запросом на весь список.
+
+    class Meta(CategorySerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class BulkGenreSerializer(GenreSerializer):
+
+    class Meta(GenreSerializer.Meta):
+        extra_kwargs = {'slug': {'validators': []}}
+
+
+class BulkTitleSerializer(TitleCreateSerializer):
+    # Жанры и категория по slug находятся одним запросом на весь список.
+    category = serializers.SlugField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+
 class MixinValidateUsernameSerializer:
 
     def validate_username(self, value):
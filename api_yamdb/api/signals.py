@@ -0,0 +1,75 @@
+# api/signals.py
+
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save,
+)
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+from .authentication import forget_user
+from .cache import (
+    AUTHORS, CATEGORIES, GENRES, RATINGS, TITLES, USERS, bump_versions,
+    review_namespace, title_namespace,
+)
+from .readers import AUTHOR_COLUMNS
+
+# Пространства имён кэша, зависящие от объекта: оценки отзывов входят
+# в рейтинг произведений, жанры и категории — в их описание, имена
+# и профили пользователей — в отзывы и комментарии (`expand=author`).
+CACHE_NAMESPACES = {
+    Category: lambda category: (CATEGORIES, TITLES),
+    Genre: lambda genre: (GENRES, TITLES),
+    Title: lambda title: (TITLES, title_namespace(title.pk)),
+    Review: lambda review: (
+        RATINGS,
+        title_namespace(review.title_id),
+        review_namespace(review.pk),
+    ),
+    Comment: lambda comment: (review_namespace(comment.review_id),),
+    User: lambda user: (
+        (USERS, AUTHORS) if getattr(user, '_author_changed', True)
+        else (USERS,)
+    ),
+}
+
+
+def invalidate_cache(sender, instance, **kwargs):
+    bump_versions(*CACHE_NAMESPACES[sender](instance))
+
+
+def invalidate_title_genres(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        bump_versions(TITLES, GENRES)
+    else:
+        bump_versions(TITLES, title_namespace(instance.pk))
+
+
+def forget_auth_user(sender, instance, **kwargs):
+    # После удаления Django обнуляет instance.pk до фиксации транзакции.
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user(user_id))
+
+
+def check_author_changed(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._author_changed = False
+        return
+    fields = list(AUTHOR_COLUMNS)
+    old_values = User.objects.filter(pk=instance.pk).values_list(
+        *fields
+    ).first()
+    instance._author_changed = old_values != tuple(
+        getattr(instance, field) for field in fields
+    )
+
+
+for model in CACHE_NAMESPACES:
+    post_save.connect(invalidate_cache, sender=model)
+    post_delete.connect(invalidate_cache, sender=model)
+pre_save.connect(check_author_changed, sender=User)
+post_save.connect(forget_auth_user, sender=User)
+post_delete.connect(forget_auth_user, sender=User)
+m2m_changed.connect(invalidate_title_genres, sender=Title.genre.through)
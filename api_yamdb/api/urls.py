@@ -4,8 +4,8 @@ from django.urls import include, path
 from rest_framework import routers
 
 from .views import (
-    CategoryViewSet, CommentViewSet, GenreViewSet, ReviewViewSet,
-    TitleViewSet, UserViewSet, signup, token,
+    AnalyticsView, CategoryViewSet, CommentViewSet, ExportView, GenreViewSet,
+    MetricsView, ReviewViewSet, TitleViewSet, UserViewSet, signup, token,
 )
 
 app_name = 'api'
@@ -32,4 +32,10 @@ auth_urlpatterns = [
 urlpatterns = [
     path('v1/', include(router_v1.urls)),
     path('v1/auth/', include(auth_urlpatterns)),
+    path('v1/export/<str:dataset>/', ExportView.as_view(), name='export'),
+    path('v1/_metrics', MetricsView.as_view(), name='metrics'),
+    path(
+        'v1/analytics/<str:dimension>/', AnalyticsView.as_view(),
+        name='analytics'
+    ),
 ]
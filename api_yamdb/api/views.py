@@ -1,63 +1,180 @@
 # api/views.py
 
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.utils.crypto import get_random_string
 from django.utils.translation import ugettext_lazy as _
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
-from reviews.models import Category, Genre, Review, Title, User
+from reviews.models import (
+    CATEGORY, GENRE, YEAR, Category, Comment, Genre, RatingSummary,
+    RatingSummaryRefresh, Review, SimilarTitle, Title, TitleStats, User,
+    score_field,
+)
 
-from .filters import TitleFilter
+from .authentication import get_token_for_user
+from .bulk import SlugBulkWriteMixin, TitleBulkWriteMixin
+from .cache import (
+    AUTHORS, CATEGORIES, GENRES, RATINGS, TITLES, USERS, CachedReadMixin,
+    review_namespace, title_namespace,
+)
+from .conditional import ConditionalGetMixin
+from .export import EXPORT_DATASETS, get_export_rows
+from .fieldsets import SparseFieldsetMixin
+from .filters import TitleFilter, TitleOrderingFilter, TitleSearchFilter
+from .locking import RowLockMixin
+from .mail import queue_mail
+from .middleware import metrics
+from .pagination import PageNumberOrKeysetPagination
 from .permissions import (
     IsAdministrator,
     IsAdministratorModeratorOwnerOrReadOnly,
     IsAdministratorOrReadOnly,
 )
-
+from .readers import (
+    CommentReader, ReviewReader, TitleReader, ValuesListMixin,
+)
+from .renderers import CSVRenderer, NDJSONRenderer, PrometheusRenderer
 from .serializers import (
-    CategorySerializer, CommentSerializer, GenreSerializer,
-    MeUserSerializer, ReviewSerializer, SignupSerializer,
-    TitleCreateSerializer, TitleGetSerializer, TokenObtainSerializer,
-    UserSerializer,
+    REVIEW_EXISTS_MESSAGE, BulkCategorySerializer, BulkGenreSerializer,
+    BulkTitleSerializer, CategorySerializer, CommentSerializer,
+    GenreSerializer, MeUserSerializer, RatingSummarySerializer,
+    ReviewSerializer, SignupSerializer, SimilarTitleSerializer,
+    TitleCreateSerializer, TitleGetSerializer, TitleStatsSerializer,
+    TokenObtainSerializer, UserSerializer,
 )
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, SparseFieldsetMixin, ValuesListMixin,
+                    RowLockMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
+    values_reader_class = ReviewReader
     permission_classes = (IsAdministratorModeratorOwnerOrReadOnly,)
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('-pub_date', '-id')
 
     def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get('title_id')
+            )
+        return self._title
+
+    def get_etag_namespaces(self):
+        return (title_namespace(self.kwargs.get('title_id')), AUTHORS)
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        if self.detail:
+            # Отсутствующий отзыв или произведение дадут 404 при поиске.
+            return self.lock_for_write(Review.objects.filter(
+                title_id=self.kwargs.get('title_id')
+            ).select_related('author'))
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        title = self.get_title()
+        author = self.request.user
+        try:
+            with transaction.atomic():
+                review = serializer.save(author=author, title=title)
+                Title.objects.filter(pk=review.title_id).change_rating(
+                    review.score, 1
+                )
+                TitleStats.objects.change(
+                    review.title_id, **{score_field(review.score): 1}
+                )
+        except IntegrityError:
+            if not Review.objects.filter(author=author, title=title).exists():
+                raise
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                REVIEW_EXISTS_MESSAGE
+            ]})
+
+    def perform_update(self, serializer):
+        old_score = serializer.instance.score
+        with transaction.atomic():
+            review = serializer.save()
+            if review.score != old_score:
+                Title.objects.filter(pk=review.title_id).change_rating(
+                    review.score - old_score, 0
+                )
+                TitleStats.objects.change(review.title_id, **{
+                    score_field(old_score): -1,
+                    score_field(review.score): 1,
+                })
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            comment_count = instance.comments.count()
+            deleted = instance.delete()[1]
+            if deleted.get(Review._meta.label):
+                Title.objects.filter(pk=instance.title_id).change_rating(
+                    -instance.score, -1
+                )
+                TitleStats.objects.change(instance.title_id, **{
+                    score_field(instance.score): -1,
+                    'comment_count': -comment_count,
+                })
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(ConditionalGetMixin, SparseFieldsetMixin,
+                     ValuesListMixin, RowLockMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
+    values_reader_class = CommentReader
     permission_classes = (IsAdministratorModeratorOwnerOrReadOnly,)
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('-pub_date', '-id')
 
     def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id'),
+            )
+        return self._review
+
+    def get_etag_namespaces(self):
+        return (review_namespace(self.kwargs.get('review_id')), AUTHORS)
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        if self.detail:
+            return self.lock_for_write(Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id'),
+            ).select_related('author'))
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        review = self.get_review()
+        with transaction.atomic():
+            serializer.save(author=self.request.user, review=review)
+            TitleStats.objects.change(review.title_id, comment_count=1)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            deleted = instance.delete()[1]
+            # get_queryset() выбирает комментарий по title_id из адреса.
+            if deleted.get(Comment._meta.label):
+                TitleStats.objects.change(
+                    self.kwargs.get('title_id'), comment_count=-1
+                )
 
-class MixinGenreAndCategoryViewSet(mixins.CreateModelMixin,
+
+class MixinGenreAndCategoryViewSet(ConditionalGetMixin,
+                                   CachedReadMixin,
+                                   SparseFieldsetMixin,
+                                   SlugBulkWriteMixin,
+                                   mixins.CreateModelMixin,
                                    mixins.DestroyModelMixin,
                                    mixins.ListModelMixin,
                                    viewsets.GenericViewSet):
@@ -70,30 +187,82 @@ class MixinGenreAndCategoryViewSet(mixins.CreateModelMixin,
 class GenreViewSet(MixinGenreAndCategoryViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    bulk_serializer_class = BulkGenreSerializer
+    bulk_cache_namespaces = (GENRES, TITLES)
+    cache_namespace = GENRES
+    cache_namespaces = etag_namespaces = (GENRES,)
 
 
 class CategoryViewSet(MixinGenreAndCategoryViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_serializer_class = BulkCategorySerializer
+    bulk_cache_namespaces = (CATEGORIES, TITLES)
+    cache_namespace = CATEGORIES
+    cache_namespaces = etag_namespaces = (CATEGORIES,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg('reviews__score'))
+class TitleViewSet(ConditionalGetMixin, CachedReadMixin, SparseFieldsetMixin,
+                   ValuesListMixin, TitleBulkWriteMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     serializer_class = TitleGetSerializer
+    values_reader_class = TitleReader
     permission_classes = (IsAdministratorOrReadOnly,)
     filter_backends = (
-        filters.SearchFilter,
-        filters.OrderingFilter,
+        TitleOrderingFilter,
         DjangoFilterBackend,
+        TitleSearchFilter,
     )
     filterset_class = TitleFilter
     ordering = ('name',)
+    pagination_class = PageNumberOrKeysetPagination
+    keyset_ordering = ('name', 'id')
+    keyset_incompatible_params = (
+        api_settings.ORDERING_PARAM, api_settings.SEARCH_PARAM
+    )
+    lookup_value_regex = r'\d+'
+    cache_namespace = TITLES
+    cache_namespaces = (TITLES, RATINGS)
+    cache_anonymous_only = True
+    bulk_serializer_class = BulkTitleSerializer
+
+    def get_etag_namespaces(self):
+        if self.action == 'retrieve':
+            return (
+                title_namespace(self.kwargs.get('pk')), GENRES, CATEGORIES
+            )
+        return (TITLES, RATINGS)
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH',):
             return TitleCreateSerializer
         return TitleGetSerializer
 
+    @action(detail=True, methods=['get'], url_path='stats',
+            url_name='stats')
+    def stats(self, request, pk=None):
+        """Распределение оценок и число отзывов и комментариев."""
+        stats = TitleStats.objects.select_related('title').filter(
+            title_id=pk
+        ).first()
+        if stats is None:
+            stats = TitleStats(title=get_object_or_404(Title, pk=pk))
+        return Response(TitleStatsSerializer(stats).data)
+
+    @action(detail=True, methods=['get'], url_path='similar',
+            url_name='similar')
+    def similar(self, request, pk=None):
+        """Похожие произведения, см. команду compute_similar_titles."""
+        similar = list(SimilarTitle.objects.filter(title_id=pk).select_related(
+            'similar'
+        ).only('score', 'similar', 'similar__name', 'similar__year'))
+        if not similar:
+            get_object_or_404(Title, pk=pk)
+        return Response(SimilarTitleSerializer(similar, many=True).data)
+
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
@@ -117,7 +286,7 @@ def signup(request):
         length=settings.CONFIRMATION_CODE_LENGTH
     )
     user.save()
-    send_mail(
+    queue_mail(
         subject=_("Регистрация пользователя на YaMDb"),
         message=f'{_("Ваш проверочный код")} {user.confirmation_code}.',
         from_email=settings.DEFAULT_FROM_EMAIL,
@@ -139,7 +308,7 @@ def token(request):
     )
     if user.confirmation_code == serializer.validated_data[confirmation_code]:
         return Response(
-            {'token': str(RefreshToken.for_user(user).access_token)},
+            {'token': str(get_token_for_user(user))},
             status=status.HTTP_200_OK
         )
     return Response(
@@ -148,7 +317,7 @@ def token(request):
     )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """Управление пользователями."""
     lookup_field = 'username'
     queryset = User.objects.all()
@@ -156,6 +325,25 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAdministrator,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
+    etag_namespaces = (USERS,)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            title_ids = list(
+                instance.reviews.values_list('title_id', flat=True)
+            )
+            commented_title_ids = list(
+                instance.comments.values_list('review__title_id', flat=True)
+            )
+            instance.delete()
+            Title.objects.filter(pk__in=title_ids).refresh_rating()
+            Title.objects.filter(
+                pk__in={*title_ids, *commented_title_ids}
+            ).refresh_stats()
+
+    def get_current_user(self):
+        # request.user содержит только поля из токена, см. authentication.py.
+        return get_object_or_404(User, pk=self.request.user.pk)
 
     @action(
         methods=['get', 'patch'],
@@ -166,10 +354,16 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer_class=MeUserSerializer,
     )
     def users_detail(self, request):
-        user = request.user
         if request.method == 'GET':
-            serializer = self.get_serializer(user)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            self.etag_per_user = True
+            return self.get_conditional_response(
+                lambda request: Response(
+                    self.get_serializer(self.get_current_user()).data,
+                    status=status.HTTP_200_OK
+                ),
+                request
+            )
+        user = self.get_current_user()
         serializer = self.get_serializer(
             user,
             data=request.data,
@@ -178,3 +372,61 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    """Потоковая выгрузка набора данных в NDJSON или CSV."""
+    permission_classes = (IsAdministrator,)
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+
+    def get(self, request, dataset):
+        model = EXPORT_DATASETS.get(dataset)
+        if model is None:
+            raise NotFound(_('Неизвестный набор данных.'))
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(*get_export_rows(model)),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{dataset}.{renderer.format}"'
+        )
+        return response
+
+
+class MetricsView(APIView):
+    """Метрики запросов этого процесса в формате Prometheus."""
+    permission_classes = (IsAdministrator,)
+    renderer_classes = (PrometheusRenderer,)
+
+    def get(self, request):
+        return Response(metrics.export())
+
+
+class AnalyticsView(APIView):
+    """Сводки рейтингов по категориям, жанрам и годам.
+
+    Сводки пересчитываются командой refresh_analytics; ответ содержит
+    время пересчёта и признак `stale`, если оно старше
+    `ANALYTICS_MAX_AGE` секунд.
+    """
+    permission_classes = (IsAdministrator,)
+    dimensions = {'categories': CATEGORY, 'genres': GENRE, 'years': YEAR}
+
+    def get(self, request, dimension):
+        if dimension not in self.dimensions:
+            raise NotFound(_('Неизвестный разрез.'))
+        dimension = self.dimensions[dimension]
+        summaries = list(RatingSummary.objects.filter(dimension=dimension))
+        refreshed_at = RatingSummaryRefresh.objects.filter(
+            dimension=dimension
+        ).values_list('refreshed_at', flat=True).first()
+        max_age = settings.ANALYTICS_MAX_AGE
+        return Response({
+            'refreshed_at': refreshed_at,
+            'max_age': max_age,
+            'stale': refreshed_at is None or (
+                timezone.now() - refreshed_at
+            ).total_seconds() > max_age,
+            'results': RatingSummarySerializer(summaries, many=True).data,
+        })
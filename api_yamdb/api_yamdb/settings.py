@@ -29,6 +29,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -112,13 +113,48 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'noreply@apiyamdb.ru'
 
+# Отправка писем фоновым потоком, см. api/mail.py.
+EMAIL_ASYNC: bool = os.getenv('EMAIL_ASYNC', default='True') == 'True'
+EMAIL_BATCH_SIZE: int = 100
+EMAIL_RETRIES: int = 3
+EMAIL_RETRY_BACKOFF: float = 1.0
+EMAIL_FLUSH_TIMEOUT: float = 10.0
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
+API_CACHE_ALIAS: str = 'default'
+
+API_CACHE_TIMEOUT: int = int(os.getenv('API_CACHE_TIMEOUT', default=300))
+
+# Сколько секунд версии данных (reviews.DataVersion) читаются из кэша
+# без запроса к базе; с локальным кэшем — задержка изменений между
+# процессами.
+DATA_VERSION_CACHE_TIMEOUT: int = int(
+    os.getenv('DATA_VERSION_CACHE_TIMEOUT', default=5)
+)
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ),
+
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
@@ -130,6 +166,25 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Число строк, читаемых из базы за раз при выгрузке, см. api/export.py.
+EXPORT_CHUNK_SIZE: int = 2000
+
+# Сколько секунд доверять роли из токена и снимку пользователя в кэше.
+JWT_USER_CACHE_TIMEOUT: int = int(
+    os.getenv('JWT_USER_CACHE_TIMEOUT', default=60)
+)
+
+# Запросы дольше стольких секунд пишутся в журнал вместе с SQL, см.
+# api/middleware.py; пустое значение отключает журнал.
+SLOW_REQUEST_THRESHOLD = os.getenv('SLOW_REQUEST_THRESHOLD', default='1.0')
+SLOW_REQUEST_THRESHOLD = (
+    float(SLOW_REQUEST_THRESHOLD) if SLOW_REQUEST_THRESHOLD else None
+)
+
+# Сводки /api/v1/analytics/ пересчитываются командой refresh_analytics
+# не реже чем раз в столько секунд; более старые помечаются stale.
+ANALYTICS_MAX_AGE: int = int(os.getenv('ANALYTICS_MAX_AGE', default=3600))
+
 CONFIRMATION_CODE_LENGTH: int = 10
 
 RESERVED_USERNAME: str = r'me'
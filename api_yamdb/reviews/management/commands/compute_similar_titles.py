@@ -0,0 +1,107 @@
+# reviews/management/commands/compute_similar_titles.py
+
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import ugettext_lazy as _
+
+from reviews.models import Review, SimilarTitle, TitleStats
+from reviews.similarity import TitleSimilarity, np
+
+
+class Command(BaseCommand):
+    help = _('Расчёт похожих произведений по оценкам пользователей')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=20,
+            help=_('сколько похожих произведений хранить для каждого'),
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help=_('сколько произведений обрабатывать за раз'),
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help=_('пересчитать только произведения с изменёнными отзывами'),
+        )
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError(
+                _('Для расчёта нужны numpy и scipy: pip install numpy scipy')
+            )
+        self.top_k = options['top_k']
+        self.chunk_size = options['chunk_size']
+        self.computed_at = timezone.now()
+        started = time.monotonic()
+        changed = None
+        if options['incremental']:
+            changed = self.get_changed_titles()
+            if changed is None:
+                self.stdout.write(_('Предыдущего расчёта нет, полный расчёт'))
+        self.similarity = TitleSimilarity(
+            Review.objects.order_by().values_list(
+                'author_id', 'title_id', 'score'
+            ).iterator(chunk_size=10000)
+        )
+        self.stdout.write(
+            f'{_("Матрица оценок")}: {self.similarity.matrix.shape[0]} × '
+            f'{self.similarity.matrix.shape[1]}, '
+            f'{self.similarity.matrix.nnz} {_("оценок")}'
+        )
+        if changed is None:
+            titles = self.similarity.title_ids.tolist()
+            self.save(titles)
+            # Произведения, у которых не осталось отзывов.
+            SimilarTitle.objects.filter(
+                computed_at__lt=self.computed_at
+            ).delete()
+        else:
+            # Списки, в которых были изменённые произведения, и новые
+            # соседи изменённых произведений тоже пересчитываются.
+            neighbors = self.save(changed)
+            titles = set(SimilarTitle.objects.filter(
+                similar_id__in=changed, computed_at__lt=self.computed_at
+            ).values_list('title_id', flat=True))
+            titles.update(neighbors)
+            titles.difference_update(changed)
+            self.save(titles)
+            titles = changed | titles
+        self.stdout.write(self.style.SUCCESS(
+            f'{_("Пересчитано произведений")}: {len(titles)} '
+            f'{_("за")} {time.monotonic() - started:.1f} {_("с")}'
+        ))
+
+    @staticmethod
+    def get_changed_titles():
+        last = SimilarTitle.objects.aggregate(value=Max('computed_at'))
+        if last['value'] is None:
+            return None
+        changed = set(TitleStats.objects.filter(
+            updated_at__gte=last['value']
+        ).values_list('title_id', flat=True))
+        # refresh_stats() удаляет статистику произведений без отзывов.
+        changed.update(SimilarTitle.objects.filter(
+            title__stats__isnull=True
+        ).values_list('title_id', flat=True).distinct())
+        return changed
+
+    def save(self, titles):
+        """Пересчитывает и записывает списки для titles.
+
+        Возвращает идентификаторы найденных похожих произведений.
+        """
+        titles = sorted(titles)
+        found = set()
+        for start in range(0, len(titles), self.chunk_size):
+            chunk = titles[start:start + self.chunk_size]
+            neighbors = self.similarity.neighbors(
+                self.similarity.indexes(chunk), self.top_k
+            )
+            neighbors = [values.tolist() for values in neighbors]
+            SimilarTitle.objects.replace(chunk, neighbors, self.computed_at)
+            found.update(neighbors[1])
+        return found
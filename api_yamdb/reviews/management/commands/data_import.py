@@ -1,13 +1,24 @@
 # reviews/management/commands/data_import.py
 
 import csv
+import json
 import os
+import time
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.management import BaseCommand
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.models import (
+    BULK_CHANGES, Category, Comment, DataVersion, Genre, Review, Title, User,
+)
 
 ALREDY_LOADED_ERROR_MESSAGE = _(
     'База данных не пуста! '
@@ -17,107 +28,592 @@ ALREDY_LOADED_ERROR_MESSAGE = _(
     'для создания новой пустой базы данных.'
 )
 
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static/data')
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Контрольная точка хранится вне static/: каталог раздаётся как статика.
+CHECKPOINT_PATH = os.path.join(
+    settings.BASE_DIR, '.data_import_checkpoint.json'
+)
+
+# Предел числа параметров в одном запросе PostgreSQL.
+MAX_QUERY_PARAMS = 65535
+
+# Файлы загружаются в порядке зависимостей: строки со ссылками
+# на ещё не загруженные объекты отбрасываются.
 data_files_list = [
     ['users.csv', User],
     ['category.csv', Category],
     ['genre.csv', Genre],
     ['titles.csv', Title],
+    ['genre_title.csv', Title.genre.through],
     ['review.csv', Review],
     ['comments.csv', Comment],
 ]
 
-genre_title = [
-    'genre_title.csv',
-    Title,
-    os.path.join(settings.BASE_DIR, 'static/data', 'genre_title.csv')
-]
 
+def batches(iterable, size):
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
 
-def get_dirs(list_files: list) -> None:
-    for i, lst in enumerate(list_files):
-        data_files_list[i].append(
-            os.path.join(settings.BASE_DIR, 'static/data', lst[0])
-        )
 
+@contextmanager
+def keep_auto_now_add(models):
+    """Сохраняет даты из файлов вместо текущего времени."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class CSVImporter:
+    """Потоковая загрузка CSV-файлов пакетами `bulk_create`."""
+
+    def __init__(self, data_dir=DATA_DIR, batch_size=DEFAULT_BATCH_SIZE,
+                 stdout=None, verbosity=1):
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.verbosity = verbosity
+        self.known_ids = {}
+        self.now = timezone.now()
+
+    def log(self, message, level=1):
+        if self.stdout is not None and self.verbosity >= level:
+            self.stdout.write(message)
 
-def import_data(list_data: list) -> None:
-    for file, model, path in list_data:
-        with open(path, 'r', encoding='utf-8') as csvfile:
+    def get_known_ids(self, model):
+        """Идентификаторы объектов модели, на которые можно ссылаться."""
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True)
+            )
+        return self.known_ids[model]
+
+    def get_related_id(self, model, value):
+        """Идентификатор в базе объекта, на который ссылается файл."""
+        return value
+
+    @staticmethod
+    def get_columns(model, header):
+        return [
+            (index, model._meta.get_field(name))
+            for index, name in enumerate(header)
+        ]
+
+    def build_object(self, model, columns, row):
+        """Создаёт объект модели или возвращает None для битой строки."""
+        values = {}
+        for index, field in columns:
+            value = row[index]
+            if value == '' and field.null:
+                value = None
+            elif field.is_relation:
+                related_model = field.related_model
+                value = self.get_related_id(
+                    related_model, field.target_field.to_python(value)
+                )
+                if value not in self.get_known_ids(related_model):
+                    return None
+            else:
+                value = field.to_python(value)
+            values[field.attname] = value
+        for field in model._meta.concrete_fields:
+            if (getattr(field, 'auto_now_add', False)
+                    and field.attname not in values):
+                values[field.attname] = self.now
+        return model(**values)
+
+    def load_file(self, file, model):
+        path = os.path.join(self.data_dir, file)
+        loaded = rejected = 0
+        started = time.monotonic()
+        with open(path, 'r', encoding='utf-8', newline='') as csvfile:
             reader = csv.reader(csvfile, delimiter=',', quotechar='"')
-            header = next(reader)
-            for row in reader:
-                import_dict = {
-                    key: value for key, value in zip(header, row)
-                }
-                if file == 'titles.csv':
-                    category = Category.objects.get(
-                        pk=import_dict['category']
-                    )
-                    import_dict['category'] = category
-                    title = model(**import_dict)
-                    title.save()
-                    with open(genre_title[2], 'r', encoding='utf-8') as f:
-                        reader_titles = csv.reader(
-                            f,
-                            delimiter=',',
-                            quotechar='"'
-                        )
-                        header_t = next(reader_titles)
-                        for row_t in reader_titles:
-                            import_dict_titles = {
-                                key: value for key, value in zip(header_t,
-                                                                 row_t)
-                            }
-                            title_id = import_dict['id']
-                            genge_title_id = import_dict_titles['title_id']
-                            if title_id == genge_title_id:
-                                genre = Genre.objects.get(
-                                    pk=import_dict_titles['genre_id']
-                                )
-                                title.genre.add(genre)
-                elif file == 'review.csv':
-                    title = Title.objects.get(
-                        id=import_dict['title_id']
-                    )
-                    import_dict['title'] = title
-                    user = User.objects.get(
-                        id=import_dict['author']
-                    )
-                    import_dict['author'] = user
-                    model.objects.create(**import_dict)
+            header = next(reader, None)
+            if header is None:
+                return loaded, rejected
+            columns = self.get_columns(model, header)
+            known_ids = self.get_known_ids(model)
+            rows = self.skip_rows(file, path, reader)
+            for batch in batches(rows, self.batch_size):
+                objects = []
+                for row in batch:
+                    obj = self.build_object(model, columns, row)
+                    if obj is None:
+                        rejected += 1
+                    else:
+                        objects.append(obj)
+                loaded += self.save_batch(model, columns, objects)
+                known_ids.update(
+                    obj.pk for obj in objects if obj.pk is not None
+                )
+                self.batch_saved(file, len(batch))
+                self.log(
+                    f'  {file}: {loaded} ({self.rate(loaded, started)} '
+                    f'{_("строк/с")})',
+                    level=2
+                )
+        return loaded, rejected
 
-                elif file == 'comments.csv':
-                    review = Review.objects.get(
-                        id=import_dict['review_id']
-                    )
-                    import_dict['review'] = review
-                    user = User.objects.get(
-                        id=import_dict['author']
+    def skip_rows(self, file, path, rows):
+        return rows
+
+    def save_batch(self, model, columns, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        return len(objects)
+
+    def batch_saved(self, file, rows):
+        pass
+
+    def file_loaded(self, file):
+        pass
+
+    def atomic(self):
+        return transaction.atomic()
+
+    def refresh_titles(self):
+        Title.objects.refresh_rating()
+        Title.objects.refresh_stats()
+
+    @staticmethod
+    def rate(rows, started):
+        return int(rows / max(time.monotonic() - started, 1e-6))
+
+    def reset_sequences(self, models):
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def run(self, files=data_files_list):
+        models = [model for _file, model in files]
+        total = 0
+        started = time.monotonic()
+        with self.atomic(), keep_auto_now_add(models):
+            for file, model in files:
+                file_started = time.monotonic()
+                loaded, rejected = self.load_file(file, model)
+                self.file_loaded(file)
+                total += loaded
+                self.log(
+                    f'{file}: {loaded} {_("строк за")} '
+                    f'{time.monotonic() - file_started:.2f} {_("с")} '
+                    f'({self.rate(loaded, file_started)} {_("строк/с")})'
+                )
+                if rejected:
+                    self.log(
+                        f'{file}: {_("пропущено строк с неверными ссылками")}'
+                        f': {rejected}'
                     )
-                    import_dict['author'] = user
-                    model.objects.create(**import_dict)
-                else:
-                    model.objects.create(**import_dict)
+            self.reset_sequences(models)
+            self.refresh_titles()
+            DataVersion.objects.bump(BULK_CHANGES)
+        self.log(
+            f'{_("Всего")}: {total} {_("строк за")} '
+            f'{time.monotonic() - started:.2f} {_("с")} '
+            f'({self.rate(total, started)} {_("строк/с")})'
+        )
+        return total
+
+
+class PostgresCopyImporter(CSVImporter):
+    """Загрузка через COPY во временную таблицу и INSERT ... SELECT.
+
+    Ссылки проверяются одним запросом на файл: строки, для которых
+    не нашлось связанного объекта, не попадают в целевую таблицу.
+    """
+
+    def stage_file(self, cursor, path, stage, columns):
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {stage} '
+            f'({", ".join(f"c{index} text" for index, _f in columns)}) '
+            'ON COMMIT DROP'
+        )
+        with open(path, 'r', encoding='utf-8', newline='') as csvfile:
+            with connection.wrap_database_errors:
+                cursor.copy_expert(
+                    f'COPY {stage} FROM STDIN WITH (FORMAT csv, HEADER true)',
+                    csvfile
+                )
+        cursor.execute(f'SELECT COUNT(*) FROM {stage}')
+        return cursor.fetchone()[0]
+
+    def get_insert_sql(self, model, columns, stage):
+        quote = connection.ops.quote_name
+        targets, values, conditions, params = [], [], [], []
+        for index, field in columns:
+            # Пустое поле COPY превращает в NULL.
+            value = f"NULLIF(s.c{index}, '')"
+            if not field.null:
+                value = f"COALESCE(s.c{index}, '')"
+            targets.append(quote(field.column))
+            values.append(f'{value}::{field.cast_db_type(connection)}')
+            if field.is_relation:
+                related = field.target_field
+                condition = (
+                    f'EXISTS (SELECT 1 FROM '
+                    f'{quote(related.model._meta.db_table)} r '
+                    f'WHERE r.{quote(related.column)} = {values[-1]})'
+                )
+                if field.null:
+                    condition = f'({value} IS NULL OR {condition})'
+                conditions.append(condition)
+        present = {field.attname for _index, field in columns}
+        for field in model._meta.concrete_fields:
+            if field.attname in present or field.primary_key:
+                continue
+            targets.append(quote(field.column))
+            values.append(f'%s::{field.cast_db_type(connection)}')
+            if getattr(field, 'auto_now_add', False):
+                params.append(self.now)
+            else:
+                params.append(field.get_prep_value(field.get_default()))
+        sql = (
+            f'INSERT INTO {quote(model._meta.db_table)} '
+            f'({", ".join(targets)}) '
+            f'SELECT {", ".join(values)} FROM {stage} s'
+        )
+        if conditions:
+            sql += f' WHERE {" AND ".join(conditions)}'
+        return sql, params
+
+    def load_file(self, file, model):
+        path = os.path.join(self.data_dir, file)
+        with open(path, 'r', encoding='utf-8', newline='') as csvfile:
+            header = next(csv.reader(csvfile), None)
+        if header is None:
+            return 0, 0
+        columns = self.get_columns(model, header)
+        stage = f'import_{model._meta.db_table}'
+        with connection.cursor() as cursor:
+            staged = self.stage_file(cursor, path, stage, columns)
+            sql, params = self.get_insert_sql(model, columns, stage)
+            cursor.execute(sql, params)
+            loaded = cursor.rowcount
+            cursor.execute(f'DROP TABLE {stage}')
+        return loaded, staged - loaded
+
+
+class UpsertImporter(CSVImporter):
+    """Инкрементная загрузка через INSERT ... ON CONFLICT.
+
+    Новые строки добавляются, изменённые обновляются, совпадающие
+    не трогаются. Каждый пакет фиксируется отдельно, а число
+    обработанных строк файла записывается в контрольную точку, так что
+    прерванная загрузка продолжается с места остановки.
+
+    Строки с ключом `conflict_fields` не из id могут соответствовать
+    объектам базы с другим id: такие идентификаторы из файла заменяются
+    в ссылках следующих файлов на идентификаторы базы. Соответствие
+    хранится в контрольной точке вместе с числом строк.
+    """
+    conflict_fields = {
+        User: ('id',),
+        Category: ('slug',),
+        Genre: ('slug',),
+        Title: ('id',),
+        Title.genre.through: ('title', 'genre'),
+        Review: ('author', 'title'),
+        Comment: ('id',),
+    }
+
+    def __init__(self, checkpoint_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.checkpoint_path = checkpoint_path or CHECKPOINT_PATH
+        self.checkpoint = self.read_checkpoint()
+        # {метка модели: {id в файле: id в базе}}, только несовпадающие.
+        self.id_map = self.checkpoint.setdefault('ids', {})
+        self.changed_titles = set()
+        self.changed_reviews = set()
+        self.refresh_all_ratings = False
+        self.refresh_all_stats = False
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def write_checkpoint(self):
+        temporary_path = f'{self.checkpoint_path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump(self.checkpoint, file)
+        os.replace(temporary_path, self.checkpoint_path)
+
+    @staticmethod
+    def get_fingerprint(path):
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime]
+
+    def skip_rows(self, file, path, rows):
+        fingerprint = self.get_fingerprint(path)
+        state = self.checkpoint.get(file)
+        if state is None or state['fingerprint'] != fingerprint:
+            state = {'fingerprint': fingerprint, 'rows': 0, 'done': False}
+            self.checkpoint[file] = state
+        if state['done']:
+            self.log(f'{file}: {_("без изменений с прошлой загрузки")}')
+            return iter(())
+        if state['rows']:
+            self.log(
+                f'{file}: {_("продолжение со строки")} {state["rows"] + 1}'
+            )
+            # Строки до контрольной точки загружены прошлым запуском.
+            if file == 'review.csv':
+                self.refresh_all_ratings = True
+            if file in ('review.csv', 'comments.csv'):
+                self.refresh_all_stats = True
+        return islice(rows, state['rows'], None)
+
+    def batch_saved(self, file, rows):
+        self.checkpoint[file]['rows'] += rows
+        self.write_checkpoint()
+
+    def file_loaded(self, file):
+        if file in self.checkpoint:
+            self.checkpoint[file]['done'] = True
+            self.write_checkpoint()
+
+    def atomic(self):
+        return nullcontext()
+
+    def refresh_titles(self):
+        titles = Title.objects.all()
+        if not self.refresh_all_ratings:
+            titles = titles.filter(pk__in=self.changed_titles)
+        titles.refresh_rating()
+        titles = Title.objects.all()
+        if not self.refresh_all_stats:
+            titles = titles.filter(
+                Q(pk__in=self.changed_titles)
+                | Q(pk__in=Review.objects.filter(
+                    pk__in=self.changed_reviews
+                ).values('title_id'))
+            )
+        titles.refresh_stats()
+
+    def get_related_id(self, model, value):
+        return self.id_map.get(model._meta.label, {}).get(str(value), value)
+
+    def match_existing(self, model, objects):
+        """Присваивает строкам id объектов базы с тем же ключом.
+
+        Возвращает строки для INSERT ... ON CONFLICT и новые строки,
+        id которых из файла уже занят другим объектом: им id назначает
+        база.
+        """
+        names = self.conflict_fields[model]
+        if names == ('id',):
+            return objects, []
+        attnames = [model._meta.get_field(name).attname for name in names]
+
+        def get_key(obj):
+            return tuple(getattr(obj, attname) for attname in attnames)
+
+        keys = {get_key(obj) for obj in objects}
+        existing = {
+            tuple(row[1:]): row[0]
+            for row in model.objects.filter(**{
+                f'{attnames[0]}__in': {key[0] for key in keys}
+            }).values_list('pk', *attnames)
+            if tuple(row[1:]) in keys
+        }
+        taken = set(model.objects.filter(
+            pk__in=[obj.pk for obj in objects if obj.pk is not None]
+        ).values_list('pk', flat=True))
+        upserted, created = [], []
+        for obj in objects:
+            if get_key(obj) in existing:
+                obj.pk = existing[get_key(obj)]
+                upserted.append(obj)
+            elif obj.pk in taken:
+                obj.pk = None
+                created.append(obj)
+            else:
+                upserted.append(obj)
+        return upserted, created
+
+    def remember_ids(self, model, file_ids, objects):
+        ids = self.id_map.setdefault(model._meta.label, {})
+        for file_id, obj in zip(file_ids, objects):
+            if file_id is not None and file_id != obj.pk:
+                ids[str(file_id)] = obj.pk
+
+    def get_upsert_sql(self, model, columns, fields):
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        keys = [
+            model._meta.get_field(name).column
+            for name in self.conflict_fields[model]
+        ]
+        updates = [
+            field.column for _index, field in columns
+            if field.column not in keys and not field.primary_key
+        ]
+        sql = (
+            f'INSERT INTO {table} '
+            f'({", ".join(quote(field.column) for field in fields)}) '
+            'VALUES {values} '
+            f'ON CONFLICT ({", ".join(quote(key) for key in keys)}) '
+        )
+        if not updates:
+            return sql + 'DO NOTHING'
+        distinct = (
+            'IS DISTINCT FROM' if connection.vendor == 'postgresql'
+            else 'IS NOT'
+        )
+        assignments = ', '.join(
+            f'{quote(column)} = EXCLUDED.{quote(column)}'
+            for column in updates
+        )
+        changed = ' OR '.join(
+            f'{table}.{quote(column)} {distinct} EXCLUDED.{quote(column)}'
+            for column in updates
+        )
+        return sql + f'DO UPDATE SET {assignments} WHERE {changed}'
+
+    def save_batch(self, model, columns, objects):
+        if not objects:
+            return 0
+        present = {field.attname for _index, field in columns}
+        fields = [
+            field for field in model._meta.concrete_fields
+            if field.attname in present or not field.primary_key
+        ]
+        sql = self.get_upsert_sql(model, columns, fields)
+        row = f'({", ".join(["%s"] * len(fields))})'
+        size = max(1, min(
+            connection.ops.bulk_batch_size(fields, objects),
+            MAX_QUERY_PARAMS // len(fields)
+        ))
+        file_ids = [obj.pk for obj in objects]
+        with transaction.atomic(), connection.cursor() as cursor:
+            upserted, created = self.match_existing(model, objects)
+            written = len(created)
+            if created:
+                # Строки с явными id не сдвигают последовательность.
+                self.reset_sequences([model])
+            for obj in created:
+                obj.save(force_insert=True)
+            for chunk in batches(upserted, size):
+                cursor.execute(
+                    sql.format(values=', '.join([row] * len(chunk))),
+                    [
+                        field.get_db_prep_save(
+                            getattr(obj, field.attname), connection
+                        )
+                        for obj in chunk
+                        for field in fields
+                    ]
+                )
+                written += cursor.rowcount
+            # Пакеты фиксируются по отдельности.
+            DataVersion.objects.bump(BULK_CHANGES)
+        self.remember_ids(model, file_ids, objects)
+        if model is Review:
+            self.changed_titles.update(obj.title_id for obj in objects)
+        elif model is Comment:
+            self.changed_reviews.update(obj.review_id for obj in objects)
+        return written
 
 
 class Command(BaseCommand):
     help = _('Загрузка данных')
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=_('Количество строк в одном INSERT-запросе'),
+        )
+        parser.add_argument(
+            '--data-dir',
+            default=DATA_DIR,
+            help=_('Каталог с CSV-файлами'),
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help=_('Не использовать COPY на PostgreSQL'),
+        )
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help=_(
+                'Добавить новые и обновить изменённые строки в непустой '
+                'базе с продолжением с контрольной точки'
+            ),
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help=_(
+                'Файл контрольной точки инкрементной загрузки '
+                '(по умолчанию .data_import_checkpoint.json рядом '
+                'с manage.py)'
+            ),
+        )
+        parser.add_argument(
+            '--reset-checkpoint',
+            action='store_true',
+            help=_('Начать инкрементную загрузку файлов с начала'),
+        )
+
+    def get_importer_options(self, options):
+        return {
+            'data_dir': options['data_dir'],
+            'batch_size': options['batch_size'],
+            'stdout': self.stdout,
+            'verbosity': options['verbosity'],
+        }
+
+    def get_upsert_importer(self, options):
+        importer = UpsertImporter(
+            checkpoint_path=options['checkpoint'],
+            **self.get_importer_options(options)
+        )
+        if options['reset_checkpoint']:
+            importer.checkpoint = {}
+        return importer
+
     def handle(self, *args, **options):
-        for lst in data_files_list:
-            if lst[1].objects.exists():
-                self.stdout.write(
-                    self.style.WARNING(ALREDY_LOADED_ERROR_MESSAGE)
-                )
-                return
-        get_dirs(data_files_list)
+        if options['incremental']:
+            importer = self.get_upsert_importer(options)
+        else:
+            for _file, model in data_files_list:
+                if model.objects.exists():
+                    self.stdout.write(
+                        self.style.WARNING(ALREDY_LOADED_ERROR_MESSAGE)
+                    )
+                    return
+            importer_class = CSVImporter
+            if connection.vendor == 'postgresql' and not options['no_copy']:
+                importer_class = PostgresCopyImporter
+            importer = importer_class(**self.get_importer_options(options))
         self.stdout.write(_('Загрузка данных...'))
         try:
-            import_data(data_files_list)
-            self.stdout.write(
-                self.style.SUCCESS(_('Модели импортированы'))
-            )
-        except Exception:
-            self.stdout.write(
-                self.style.ERROR(_('Не удалось выполнить импорт'))
-            )
+            importer.run()
+        except (DatabaseError, LookupError, OSError, ValidationError,
+                ValueError) as error:
+            self.stdout.write(self.style.ERROR(
+                f'{_("Не удалось выполнить импорт")}: {error}'
+            ))
+            return
+        self.stdout.write(
+            self.style.SUCCESS(_('Модели импортированы'))
+        )
@@ -0,0 +1,20 @@
+# reviews/management/commands/rebuild_title_stats.py
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.utils.translation import ugettext_lazy as _
+
+from reviews.models import BULK_CHANGES, DataVersion, Title
+
+
+class Command(BaseCommand):
+    help = _('Пересчёт статистики оценок и комментариев произведений')
+
+    def handle(self, *args, **options):
+        self.stdout.write(_('Пересчёт статистики...'))
+        with transaction.atomic():
+            updated = Title.objects.refresh_stats()
+            DataVersion.objects.bump(BULK_CHANGES)
+        self.stdout.write(
+            self.style.SUCCESS(f'{_("Обновлено произведений")}: {updated}')
+        )
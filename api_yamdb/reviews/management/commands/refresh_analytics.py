@@ -0,0 +1,28 @@
+# reviews/management/commands/refresh_analytics.py
+
+from django.core.management import BaseCommand
+from django.utils.translation import ugettext_lazy as _
+
+from reviews.models import DIMENSION_CHOICES, RatingSummary
+
+DIMENSIONS = [dimension for dimension, _name in DIMENSION_CHOICES]
+
+
+class Command(BaseCommand):
+    help = _('Пересчёт сводок рейтингов по категориям, жанрам и годам')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dimension',
+            nargs='*',
+            choices=DIMENSIONS,
+            default=DIMENSIONS,
+            help=_('разрезы для пересчёта, по умолчанию все'),
+        )
+
+    def handle(self, *args, **options):
+        for dimension in options['dimension']:
+            rows = RatingSummary.objects.refresh(dimension)
+            self.stdout.write(
+                self.style.SUCCESS(f'{dimension}: {rows} {_("строк")}')
+            )
@@ -0,0 +1,64 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:05
+
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('pg_catalog.russian', "
+    "coalesce({table}.name, '')), 'A') || "
+    "setweight(to_tsvector('pg_catalog.russian', "
+    "coalesce({table}.description, '')), 'B')"
+)
+
+FORWARD_SQL = [
+    'ALTER TABLE reviews_title ADD COLUMN search_vector tsvector',
+    f"""
+    CREATE FUNCTION reviews_title_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR_SQL.format(table='NEW')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER reviews_title_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description ON reviews_title
+    FOR EACH ROW EXECUTE PROCEDURE reviews_title_search_vector_update()
+    """,
+    'UPDATE reviews_title SET search_vector = '
+    + SEARCH_VECTOR_SQL.format(table='reviews_title'),
+    'CREATE INDEX reviews_title_search_vector_idx '
+    'ON reviews_title USING GIN (search_vector)',
+]
+
+BACKWARD_SQL = [
+    'DROP TRIGGER reviews_title_search_vector_update ON reviews_title',
+    'DROP FUNCTION reviews_title_search_vector_update()',
+    'ALTER TABLE reviews_title DROP COLUMN search_vector',
+]
+
+
+def run_postgresql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+    """Полнотекстовый индекс произведений (только PostgreSQL).
+
+    Колонка search_vector не описана в модели: на других базах поиск
+    выполняется по индексу в памяти, см. api/search.py.
+    """
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_postgresql(FORWARD_SQL), run_postgresql(BACKWARD_SQL)
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:39
+
+from django.db import migrations, models
+
+GENRE_TITLE_INDEX = 'title_genre_genre_title_idx'
+
+
+def get_genre_indexes(schema_editor, through):
+    """Индексы таблицы жанров произведений только по genre_id."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, through._meta.db_table
+        )
+    return [
+        name for name, options in constraints.items()
+        if options['index'] and not options['unique']
+        and options['columns'] == ['genre_id']
+    ]
+
+
+def replace_genre_index(apps, schema_editor):
+    """Заменяет индекс Django по genre_id составным (genre_id, title_id).
+
+    Составной индекс обслуживает те же запросы и позволяет выбирать
+    произведения жанра только по индексу.
+    """
+    through = apps.get_model('reviews', 'Title').genre.through
+    quote_name = schema_editor.quote_name
+    table = quote_name(through._meta.db_table)
+    schema_editor.execute(
+        f'CREATE INDEX {quote_name(GENRE_TITLE_INDEX)} '
+        f'ON {table} (genre_id, title_id)'
+    )
+    for name in get_genre_indexes(schema_editor, through):
+        schema_editor.execute(schema_editor._delete_index_sql(through, name))
+
+
+def restore_genre_index(apps, schema_editor):
+    through = apps.get_model('reviews', 'Title').genre.through
+    schema_editor.execute(schema_editor._create_index_sql(
+        through, [through._meta.get_field('genre')]
+    ))
+    schema_editor.execute(
+        schema_editor._delete_index_sql(through, GENRE_TITLE_INDEX)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', '-pub_date', '-id'], name='comment_review_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', '-pub_date', '-id'], name='review_title_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['category', 'name', 'id'], name='title_category_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year', 'name', 'id'], name='title_year_name_idx'),
+        ),
+        migrations.RunPython(
+            replace_genre_index, restore_genre_index
+        ),
+    ]
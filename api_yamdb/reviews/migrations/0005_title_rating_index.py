@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:12
+
+from django.db import migrations
+
+RATING_INDEX = 'title_rating_idx'
+
+
+def create_rating_index(apps, schema_editor):
+    """Индекс для сортировки по рейтингу без произведений без оценок.
+
+    Django 2.2 не описывает в Meta.indexes порядок NULL, поэтому индекс
+    создаётся здесь: `rating DESC NULLS LAST, id DESC` отдаёт лучшие
+    произведения первыми, а без оценок — последними. В SQLite NULL
+    при убывании и так идут последними.
+    """
+    title = apps.get_model('reviews', 'Title')
+    quote_name = schema_editor.quote_name
+    nulls_last = ''
+    if schema_editor.connection.vendor == 'postgresql':
+        nulls_last = ' NULLS LAST'
+    schema_editor.execute(
+        f'CREATE INDEX {quote_name(RATING_INDEX)} '
+        f'ON {quote_name(title._meta.db_table)} '
+        f'(rating DESC{nulls_last}, id DESC)'
+    )
+
+
+def drop_rating_index(apps, schema_editor):
+    title = apps.get_model('reviews', 'Title')
+    schema_editor.execute(schema_editor._delete_index_sql(title, RATING_INDEX))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_api_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_rating_index, drop_rating_index),
+    ]
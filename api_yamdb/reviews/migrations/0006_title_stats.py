@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:12
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def fill_stats(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Comment = apps.get_model('reviews', 'Comment')
+    TitleStats = apps.get_model('reviews', 'TitleStats')
+    stats = {}
+    reviews = Review.objects.order_by().values('title_id').annotate(**{
+        f'score_{score}': Count('pk', filter=Q(score=score))
+        for score in range(1, 11)
+    })
+    for row in reviews.iterator():
+        stats[row.pop('title_id')] = row
+    comments = Comment.objects.order_by().values('review__title_id').annotate(
+        count=Count('pk')
+    ).values_list('review__title_id', 'count')
+    for title_id, count in comments.iterator():
+        stats.setdefault(title_id, {})['comment_count'] = count
+    TitleStats.objects.bulk_create(
+        (TitleStats(title_id=title_id, **values)
+         for title_id, values in stats.items()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_rating_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleStats',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Количество комментариев')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('score_1', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 1')),
+                ('score_2', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 2')),
+                ('score_3', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 3')),
+                ('score_4', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 4')),
+                ('score_5', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 5')),
+                ('score_6', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 6')),
+                ('score_7', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 7')),
+                ('score_8', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 8')),
+                ('score_9', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 9')),
+                ('score_10', models.PositiveIntegerField(default=0, verbose_name='Количество оценок 10')),
+            ],
+            options={
+                'verbose_name': 'Статистика произведения',
+                'verbose_name_plural': 'Статистика произведений',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
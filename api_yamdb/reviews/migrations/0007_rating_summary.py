@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('category', 'Категория'), ('genre', 'Жанр'), ('year', 'Год выпуска')], max_length=8, verbose_name='Разрез')),
+                ('key', models.CharField(max_length=50, verbose_name='Ключ')),
+                ('name', models.CharField(max_length=256, verbose_name='Название')),
+                ('title_count', models.PositiveIntegerField(verbose_name='Количество произведений')),
+                ('rated_title_count', models.PositiveIntegerField(verbose_name='Количество произведений с оценками')),
+                ('review_count', models.PositiveIntegerField(verbose_name='Количество отзывов')),
+                ('average_rating', models.FloatField(null=True, verbose_name='Средний рейтинг')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Сводка рейтингов',
+                'verbose_name_plural': 'Сводки рейтингов',
+                'ordering': ('dimension', '-review_count', 'key'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ratingsummary',
+            constraint=models.UniqueConstraint(fields=('dimension', 'key'), name='unique rating summary'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:11
+
+import time
+
+from django.db import migrations, models
+
+
+def start_versions(apps, schema_editor):
+    # Прежние версии хранились в кэше: ответы, выданные до миграции,
+    # считаются устаревшими.
+    DataVersion = apps.get_model('reviews', 'DataVersion')
+    DataVersion.objects.create(namespace='bulk', version=time.time())
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_similar_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Пространство имён')),
+                ('version', models.FloatField(verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия данных',
+                'verbose_name_plural': 'Версии данных',
+            },
+        ),
+        migrations.RunPython(start_versions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-18 21:45
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def copy_refresh_times(apps, schema_editor):
+    # Время пересчёта разрезов, у которых уже есть строки сводки.
+    RatingSummary = apps.get_model('reviews', 'RatingSummary')
+    RatingSummaryRefresh = apps.get_model('reviews', 'RatingSummaryRefresh')
+    rows = RatingSummary.objects.order_by().values('dimension').annotate(
+        last=Max('refreshed_at')
+    ).values_list('dimension', 'last')
+    RatingSummaryRefresh.objects.bulk_create(
+        RatingSummaryRefresh(dimension=dimension, refreshed_at=refreshed_at)
+        for dimension, refreshed_at in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_title_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSummaryRefresh',
+            fields=[
+                ('dimension', models.CharField(choices=[('category', 'Категория'), ('genre', 'Жанр'), ('year', 'Год выпуска')], max_length=8, primary_key=True, serialize=False, verbose_name='Разрез')),
+                ('refreshed_at', models.DateTimeField(verbose_name='Дата пересчёта')),
+            ],
+            options={
+                'verbose_name': 'Пересчёт сводки рейтингов',
+                'verbose_name_plural': 'Пересчёты сводок рейтингов',
+            },
+        ),
+        migrations.RunPython(copy_refresh_times, migrations.RunPython.noop),
+    ]
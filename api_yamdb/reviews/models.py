@@ -2,8 +2,16 @@
 
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import caches
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import (
+    Avg, Case, Count, ExpressionWrapper, F, FloatField, OuterRef, Q,
+    Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from django.utils.text import format_lazy
 from django.utils.translation import ugettext_lazy as _
 
 from .validators import validate_username, validate_year
@@ -18,6 +26,13 @@ ROLE_CHOICES = (
     (ADMIN, _('Администратор')),
 )
 
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    """Поле TitleStats с количеством оценок score."""
+    return f'score_{score}'
+
 
 class User(AbstractUser):
     username = models.CharField(
@@ -133,6 +148,12 @@ class Review(AuthorshipModel):
                 fields=['author', 'title'],
                 name='unique review')
         ]
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         verbose_name = _('Отзыв')
         verbose_name_plural = _('Отзывы')
         default_related_name = 'reviews'
@@ -149,6 +170,12 @@ class Comment(AuthorshipModel):
     )
 
     class Meta(AuthorshipModel.Meta):
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
         verbose_name = _('Комментарий')
         verbose_name_plural = _('Комментарии')
         default_related_name = 'comments'
@@ -170,6 +197,73 @@ class Genre(GenreAndCategoryModel):
         verbose_name_plural = _('Жанры')
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def change_rating(self, score_delta, count_delta):
+        """Инкрементно изменяет сумму и количество оценок произведений."""
+        return self.update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+            rating=Case(
+                When(rating_count=-count_delta, then=Value(None)),
+                default=ExpressionWrapper(
+                    Cast(F('rating_sum') + score_delta, FloatField())
+                    / (F('rating_count') + count_delta),
+                    output_field=FloatField()
+                ),
+                output_field=FloatField(),
+            ),
+        )
+
+    def refresh_rating(self):
+        """Пересчитывает рейтинг произведений по всем отзывам."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(value=Sum('score')).values('value')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(value=Count('id')).values('value')),
+                0
+            ),
+            rating=Subquery(
+                reviews.annotate(value=Avg('score')).values('value'),
+                output_field=FloatField()
+            ),
+        )
+
+    def refresh_stats(self):
+        """Пересчитывает статистику произведений по всем отзывам."""
+        titles = self.order_by().values('pk')
+        stats = {}
+        reviews = Review.objects.filter(title__in=titles).order_by().values(
+            'title_id'
+        ).annotate(**{
+            score_field(score): Count('pk', filter=Q(score=score))
+            for score in SCORES
+        })
+        for row in reviews.iterator():
+            stats[row.pop('title_id')] = row
+        comments = Comment.objects.filter(
+            review__title__in=titles
+        ).order_by().values('review__title_id').annotate(
+            count=Count('pk')
+        ).values_list('review__title_id', 'count')
+        for title_id, count in comments.iterator():
+            stats.setdefault(title_id, {})['comment_count'] = count
+        # Произведения без отзывов не хранят статистику: нулевые счётчики.
+        TitleStats.objects.filter(title__in=titles).delete()
+        TitleStats.objects.bulk_create(
+            (TitleStats(title_id=title_id, **values)
+             for title_id, values in stats.items()),
+            batch_size=1000
+        )
+        return len(stats)
+
+
 class Title(models.Model):
     """Произведения."""
     name = models.TextField(
@@ -196,11 +290,480 @@ class Title(models.Model):
         related_name='titles',
         verbose_name=_('Категория'),
     )
+    rating_sum = models.PositiveIntegerField(
+        _('Сумма оценок'),
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        _('Количество оценок'),
+        default=0,
+        editable=False,
+    )
+    rating = models.FloatField(
+        _('Рейтинг'),
+        null=True,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name',)
+        indexes = [
+            models.Index(
+                fields=['category', 'name', 'id'],
+                name='title_category_name_idx'
+            ),
+            models.Index(
+                fields=['year', 'name', 'id'], name='title_year_name_idx'
+            ),
+            # Страницы `?pagination=cursor` без фильтров.
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+        ]
         verbose_name = _('Произведение')
         verbose_name_plural = _('Произведения')
 
     def __str__(self):
         return self.name[:15]
+
+
+class TitleStatsQuerySet(models.QuerySet):
+
+    def change(self, title_id, **deltas):
+        """Инкрементно изменяет счётчики статистики произведения.
+
+        Вызывается в транзакции, изменившей отзыв или комментарий. Если
+        строки ещё нет, например после loaddata, она вычисляется по
+        отзывам и комментариям, которые уже включают изменение.
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return 0
+        now = timezone.now()
+        updated = self.filter(pk=title_id).update(updated_at=now, **{
+            field: F(field) + delta for field, delta in deltas.items()
+        })
+        return updated or self.create_from_reviews(title_id, now, deltas)
+
+    def create_from_reviews(self, title_id, updated_at, deltas):
+        """Создаёт строку статистики по отзывам и комментариям.
+
+        Один запрос INSERT ... SELECT ... ON CONFLICT: если строку
+        одновременно создала другая транзакция, к ней прибавляются
+        deltas.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        meta = self.model._meta
+        table = quote(meta.db_table)
+        comments = Comment.objects.filter(
+            review__title_id=title_id
+        ).order_by().values('review__title_id').annotate(
+            count=Count('pk')
+        ).values('count')
+        counts = {
+            'updated_at': Value(
+                updated_at, output_field=meta.get_field('updated_at')
+            ),
+            'comment_count': Coalesce(Subquery(comments), 0),
+            **{
+                score_field(score): Count('pk', filter=Q(score=score))
+                for score in SCORES
+            },
+        }
+        reviews = Review.objects.filter(title_id=title_id).order_by().values(
+            'title_id'
+        ).annotate(**counts)
+        select, params = reviews.query.get_compiler(self.db).as_sql()
+        columns = [meta.pk.column] + [
+            meta.get_field(name).column for name in counts
+        ]
+        updated_column = quote(meta.get_field('updated_at').column)
+        assignments = [f'{updated_column} = EXCLUDED.{updated_column}'] + [
+            f'{quote(column)} = {table}.{quote(column)} + %s'
+            for column in (meta.get_field(field).column for field in deltas)
+        ]
+        sql = (
+            f'INSERT INTO {table} '
+            f'({", ".join(quote(column) for column in columns)}) {select} '
+            f'ON CONFLICT ({quote(meta.pk.column)}) '
+            f'DO UPDATE SET {", ".join(assignments)}'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*params, *deltas.values()])
+            return cursor.rowcount
+
+
+class TitleStats(models.Model):
+    """Распределение оценок и число комментариев произведения.
+
+    Счётчики изменяются вместе с отзывами и комментариями
+    (api/views.py), пересчитываются командой rebuild_title_stats.
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name=_('Произведение'),
+    )
+    comment_count = models.PositiveIntegerField(
+        _('Количество комментариев'),
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        _('Дата обновления'),
+        auto_now=True,
+    )
+
+    objects = TitleStatsQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Статистика произведения')
+        verbose_name_plural = _('Статистика произведений')
+
+    def __str__(self):
+        return str(self.title_id)
+
+    @property
+    def scores(self):
+        return {
+            str(score): getattr(self, score_field(score)) for score in SCORES
+        }
+
+    @property
+    def review_count(self):
+        return sum(getattr(self, score_field(score)) for score in SCORES)
+
+
+for score in SCORES:
+    TitleStats.add_to_class(score_field(score), models.PositiveIntegerField(
+        format_lazy('{} {}', _('Количество оценок'), score),
+        default=0,
+    ))
+
+
+CATEGORY = 'category'
+GENRE = 'genre'
+YEAR = 'year'
+
+DIMENSION_CHOICES = (
+    (CATEGORY, _('Категория')),
+    (GENRE, _('Жанр')),
+    (YEAR, _('Год выпуска')),
+)
+
+
+class RatingSummaryQuerySet(models.QuerySet):
+
+    def get_groups(self, dimension):
+        """Строки сводки из хранимых сумм оценок произведений.
+
+        Средний рейтинг — средняя оценка всех отзывов группы, а не
+        среднее рейтингов произведений: произведение с одним отзывом
+        весит меньше произведения с сотней.
+        """
+        if dimension == CATEGORY:
+            groups = Title.objects.filter(category__isnull=False).values(
+                key=F('category__slug'), group_name=F('category__name')
+            )
+            prefix = ''
+        elif dimension == GENRE:
+            groups = Title.genre.through.objects.values(
+                key=F('genre__slug'), group_name=F('genre__name')
+            )
+            prefix = 'title__'
+        else:
+            groups = Title.objects.values(key=F('year'))
+            prefix = ''
+        return groups.order_by().annotate(
+            title_count=Count(f'{prefix}pk'),
+            rated_title_count=Count(f'{prefix}rating'),
+            review_count=Coalesce(Sum(f'{prefix}rating_count'), 0),
+            average_rating=ExpressionWrapper(
+                Cast(Sum(f'{prefix}rating_sum'), FloatField())
+                / NullIf(Sum(f'{prefix}rating_count'), 0),
+                output_field=FloatField()
+            ),
+        )
+
+    def refresh(self, dimension):
+        """Пересчитывает сводку одного разреза в одной транзакции.
+
+        Агрегируются хранимые суммы и количества оценок произведений,
+        а не отзывы; до фиксации читатели видят прежнюю сводку.
+        """
+        refreshed_at = timezone.now()
+        summaries = [
+            RatingSummary(
+                dimension=dimension,
+                key=str(row['key']),
+                name=str(row.get('group_name', row['key'])),
+                title_count=row['title_count'],
+                rated_title_count=row['rated_title_count'],
+                review_count=row['review_count'],
+                average_rating=row['average_rating'],
+                refreshed_at=refreshed_at,
+            )
+            for row in self.get_groups(dimension)
+        ]
+        with transaction.atomic(using=self.db):
+            self.filter(dimension=dimension).delete()
+            self.bulk_create(summaries, batch_size=1000)
+            # Время пересчёта хранится отдельно: у разреза может не быть
+            # строк сводки.
+            RatingSummaryRefresh.objects.using(self.db).update_or_create(
+                dimension=dimension,
+                defaults={'refreshed_at': refreshed_at},
+            )
+        return len(summaries)
+
+
+class RatingSummary(models.Model):
+    """Рейтинг и число отзывов по категориям, жанрам и годам.
+
+    Заполняется командой refresh_analytics, см. api/views.py
+    AnalyticsView.
+    """
+    dimension = models.CharField(
+        _('Разрез'),
+        max_length=max(len(dimension) for dimension, _ in DIMENSION_CHOICES),
+        choices=DIMENSION_CHOICES,
+    )
+    key = models.CharField(
+        _('Ключ'),
+        max_length=50,
+    )
+    name = models.CharField(
+        _('Название'),
+        max_length=256,
+    )
+    title_count = models.PositiveIntegerField(
+        _('Количество произведений'),
+    )
+    rated_title_count = models.PositiveIntegerField(
+        _('Количество произведений с оценками'),
+    )
+    review_count = models.PositiveIntegerField(
+        _('Количество отзывов'),
+    )
+    average_rating = models.FloatField(
+        _('Средний рейтинг'),
+        null=True,
+    )
+    refreshed_at = models.DateTimeField(
+        _('Дата пересчёта'),
+    )
+
+    objects = RatingSummaryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('dimension', '-review_count', 'key')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dimension', 'key'],
+                name='unique rating summary'
+            )
+        ]
+        verbose_name = _('Сводка рейтингов')
+        verbose_name_plural = _('Сводки рейтингов')
+
+    def __str__(self):
+        return f'{self.dimension}: {self.key}'
+
+
+class RatingSummaryRefresh(models.Model):
+    """Время последнего пересчёта разреза сводки рейтингов."""
+    dimension = models.CharField(
+        _('Разрез'),
+        max_length=max(len(dimension) for dimension, _ in DIMENSION_CHOICES),
+        choices=DIMENSION_CHOICES,
+        primary_key=True,
+    )
+    refreshed_at = models.DateTimeField(
+        _('Дата пересчёта'),
+    )
+
+    class Meta:
+        verbose_name = _('Пересчёт сводки рейтингов')
+        verbose_name_plural = _('Пересчёты сводок рейтингов')
+
+    def __str__(self):
+        return f'{self.dimension}: {self.refreshed_at}'
+
+
+class SimilarTitleQuerySet(models.QuerySet):
+
+    def replace(self, title_ids, neighbors, computed_at):
+        """Заменяет списки похожих произведений title_ids.
+
+        neighbors — последовательности (произведение, похожее, близость).
+        """
+        with transaction.atomic(using=self.db):
+            self.filter(title_id__in=title_ids).delete()
+            return self.bulk_create(
+                (SimilarTitle(
+                    title_id=title_id, similar_id=similar_id, score=score,
+                    computed_at=computed_at,
+                ) for title_id, similar_id, score in zip(*neighbors)),
+                batch_size=1000
+            )
+
+
+class SimilarTitle(models.Model):
+    """Похожие произведения по оценкам пользователей.
+
+    Заполняется командой compute_similar_titles.
+    """
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='similar_titles',
+        db_index=False,
+        verbose_name=_('Произведение'),
+    )
+    similar = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('Похожее произведение'),
+    )
+    score = models.FloatField(
+        _('Близость'),
+    )
+    computed_at = models.DateTimeField(
+        _('Дата расчёта'),
+    )
+
+    objects = SimilarTitleQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-score',)
+        indexes = [
+            # Заменяет индекс внешнего ключа title_id.
+            models.Index(
+                fields=['title', '-score'], name='similar_title_score_idx'
+            ),
+        ]
+        verbose_name = _('Похожее произведение')
+        verbose_name_plural = _('Похожие произведения')
+
+    def __str__(self):
+        return f'{self.title_id} -> {self.similar_id}'
+
+
+# Изменения в обход сигналов моделей: команды пересчёта и загрузки
+# данных. Версия этого пространства имён входит в версию любого ответа.
+BULK_CHANGES = 'bulk'
+
+
+VERSION_CACHE_KEY = 'data-version:{}'
+
+
+def get_version_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+class DataVersionQuerySet(models.QuerySet):
+
+    def get_versions(self, namespaces):
+        """Версии пространств имён; отсутствующие ещё не изменялись.
+
+        Версии читаются из кэша, а недостающие — из базы и кладутся в кэш
+        на DATA_VERSION_CACHE_TIMEOUT секунд: при локальном кэше другие
+        процессы видят новую версию не позже, чем через это время.
+        """
+        cache = get_version_cache()
+        keys = {
+            namespace: VERSION_CACHE_KEY.format(namespace)
+            for namespace in namespaces
+        }
+        cached = cache.get_many(keys.values())
+        versions = {
+            namespace: cached[key]
+            for namespace, key in keys.items() if key in cached
+        }
+        missing = [
+            namespace for namespace in namespaces if namespace not in versions
+        ]
+        if missing:
+            stored = dict(self.filter(namespace__in=missing).values_list(
+                'namespace', 'version'
+            ))
+            for namespace in missing:
+                versions[namespace] = stored.get(namespace, 0)
+                # add: не затирает версию, сброшенную параллельным bump.
+                cache.add(
+                    keys[namespace], versions[namespace],
+                    settings.DATA_VERSION_CACHE_TIMEOUT
+                )
+        return versions
+
+    def bump(self, *namespaces):
+        """Отмечает изменение данных namespaces после фиксации транзакции.
+
+        Версия меняется отдельным коротким запросом, когда новые данные
+        уже видны, поэтому транзакция изменения не блокирует строки
+        версий и не может взаимно заблокироваться с другими записями.
+        Вне транзакции версия меняется сразу.
+        """
+        namespaces = sorted(set(namespaces))
+        if namespaces:
+            transaction.on_commit(
+                lambda: self.bump_now(namespaces), using=self.db
+            )
+
+    def bump_now(self, namespaces):
+        """Увеличивает версии и удаляет их копии из кэша.
+
+        Версия — текущее время, но не меньше прежней версии: часы
+        процессов могут расходиться.
+        """
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        meta = self.model._meta
+        table = quote(meta.db_table)
+        namespace = quote(meta.get_field('namespace').column)
+        version = quote(meta.get_field('version').column)
+        now = timezone.now().timestamp()
+        sql = (
+            f'INSERT INTO {table} ({namespace}, {version}) '
+            f'VALUES {", ".join(["(%s, %s)"] * len(namespaces))} '
+            f'ON CONFLICT ({namespace}) DO UPDATE SET {version} = CASE '
+            f'WHEN EXCLUDED.{version} > {table}.{version} '
+            f'THEN EXCLUDED.{version} ELSE {table}.{version} + 0.001 END'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [
+                value for name in namespaces for value in (name, now)
+            ])
+        get_version_cache().delete_many(
+            [VERSION_CACHE_KEY.format(name) for name in namespaces]
+        )
+
+
+class DataVersion(models.Model):
+    """Время последнего изменения данных пространства имён.
+
+    По версиям строятся ETag, Last-Modified и ключи кэша ответов API
+    (api/cache.py). Версия увеличивается после фиксации изменения
+    и хранится в базе, поэтому одинакова для всех процессов.
+    """
+    namespace = models.CharField(
+        _('Пространство имён'),
+        max_length=64,
+        primary_key=True,
+    )
+    version = models.FloatField(
+        _('Версия'),
+    )
+
+    objects = DataVersionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = _('Версия данных')
+        verbose_name_plural = _('Версии данных')
+
+    def __str__(self):
+        return f'{self.namespace}: {self.version}'
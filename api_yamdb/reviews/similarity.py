@@ -0,0 +1,111 @@
+# reviews/similarity.py
+
+from itertools import islice
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+# Доля ненулевых близостей, с которой top-K выбирается по плотным
+# блокам, и число элементов такого блока.
+DENSITY = 0.25
+DENSE_BLOCK_SIZE = 2 ** 22
+
+
+class TitleSimilarity:
+    """Косинусная близость произведений по оценкам пользователей.
+
+    Оценки центрируются по среднему пользователя (скорректированный
+    косинус), столбцы матрицы пользователь × произведение нормируются,
+    поэтому близость пары — скалярное произведение столбцов.
+    """
+
+    def __init__(self, reviews, chunk_size=100000):
+        # reviews — итератор (автор, произведение, оценка).
+        reviews = iter(reviews)
+        chunks = [
+            np.array(chunk, dtype=np.int64).reshape(-1, 3)
+            for chunk in iter(lambda: list(islice(reviews, chunk_size)), [])
+        ]
+        data = (
+            np.concatenate(chunks) if chunks
+            else np.empty((0, 3), dtype=np.int64)
+        )
+        user_ids, users = np.unique(data[:, 0], return_inverse=True)
+        self.title_ids, titles = np.unique(data[:, 1], return_inverse=True)
+        users, titles = users.ravel(), titles.ravel()
+        scores = data[:, 2].astype(np.float64)
+        if len(scores):
+            scores -= (
+                np.bincount(users, weights=scores) / np.bincount(users)
+            )[users]
+        matrix = sparse.csr_matrix(
+            (scores, (users, titles)),
+            shape=(len(user_ids), len(self.title_ids))
+        )
+        matrix.eliminate_zeros()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)))
+        norms = norms.ravel()
+        norms[norms == 0] = 1
+        self.matrix = (matrix @ sparse.diags(1 / norms)).tocsr()
+        self.items = self.matrix.T.tocsr()
+
+    def indexes(self, title_ids):
+        """Номера столбцов для title_ids; отсутствующие пропускаются."""
+        title_ids = np.asarray(sorted(title_ids), dtype=np.int64)
+        indexes = np.searchsorted(self.title_ids, title_ids)
+        found = indexes < len(self.title_ids)
+        found[found] = self.title_ids[indexes[found]] == title_ids[found]
+        return indexes[found]
+
+    def neighbors(self, indexes, top_k):
+        """Top-K похожих произведений для столбцов indexes.
+
+        Возвращает массивы идентификаторов произведений, похожих
+        произведений и близости; пары с неположительной близостью
+        отбрасываются, внутри произведения — по убыванию близости.
+        """
+        rows, columns, scores = self.get_candidates(indexes, top_k)
+        keep = (scores > 0) & (columns != indexes[rows])
+        rows, columns, scores = rows[keep], columns[keep], scores[keep]
+        order = np.lexsort((columns, -scores, rows))
+        rows, columns, scores = rows[order], columns[order], scores[order]
+        keep = np.arange(len(rows)) - np.searchsorted(rows, rows) < top_k
+        return (
+            self.title_ids[indexes[rows[keep]]],
+            self.title_ids[columns[keep]],
+            np.minimum(scores[keep], 1.0),
+        )
+
+    def get_candidates(self, indexes, top_k):
+        """Пары (строка, столбец, близость), среди которых есть top-K.
+
+        Разреженное произведение отдаётся целиком. Если оно почти
+        плотное, близости считаются плотными блоками строк, и в каждой
+        строке без полной сортировки отбирается top_k + 1 значений
+        (с учётом самого произведения).
+        """
+        chunk = self.items[indexes]
+        width = self.matrix.shape[1]
+        # Число умножений — верхняя оценка ненулевых близостей.
+        products = np.diff(self.matrix.indptr)[chunk.indices].sum()
+        if products < DENSITY * len(indexes) * width or top_k + 1 >= width:
+            similarity = (chunk @ self.matrix).tocoo()
+            return similarity.row, similarity.col, similarity.data
+        step = max(1, DENSE_BLOCK_SIZE // width)
+        parts = []
+        for start in range(0, len(indexes), step):
+            block = chunk[start:start + step]
+            users = np.unique(block.indices)
+            block = np.asarray(
+                block[:, users].toarray() @ self.matrix[users]
+            )
+            columns = np.argpartition(-block, top_k, axis=1)[:, :top_k + 1]
+            parts.append((
+                np.repeat(np.arange(start, start + len(block)), top_k + 1),
+                columns.ravel(),
+                np.take_along_axis(block, columns, axis=1).ravel(),
+            ))
+        return tuple(np.concatenate(values) for values in zip(*parts))
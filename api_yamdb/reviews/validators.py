@@ -1,25 +1,64 @@
 # reviews/validators.py
 
+import re
+import time
 from datetime import datetime
+from functools import lru_cache
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.validators import RegexValidator
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 
 
+class CurrentYear:
+    """Текущий год; пересчитывается только после наступления нового года."""
+
+    def __init__(self):
+        self.year = None
+        self.next_year_at = 0.0
+
+    def __call__(self):
+        if time.time() >= self.next_year_at:
+            now = datetime.now()
+            self.year = now.year
+            self.next_year_at = datetime(now.year + 1, 1, 1).timestamp()
+        return self.year
+
+
+current_year = CurrentYear()
+
+
 def validate_year(year):
-    current_year = datetime.now().year
-    if year > current_year:
+    year_now = current_year()
+    if year > year_now:
         raise ValidationError(
-            f'{year} год не может быть больше, чем {current_year}!'
+            f'{year} год не может быть больше, чем {year_now}!'
         )
 
 
+@lru_cache(maxsize=None)
+def get_username_regexes():
+    """Скомпилированные `settings.USERNAME_REGEXES`."""
+    return tuple(
+        (re.compile(regex), inverse_match)
+        for regex, inverse_match in settings.USERNAME_REGEXES
+    )
+
+
+@receiver(setting_changed)
+def reset_username_regexes(setting, **kwargs):
+    if setting == 'USERNAME_REGEXES':
+        get_username_regexes.cache_clear()
+
+
 def validate_username(value):
-    for regex, inverse_match in settings.USERNAME_REGEXES:
-        RegexValidator(
-            regex=regex,
-            message=_(f'{value} - недопустимое имя пользователя.'),
-            inverse_match=inverse_match
-        )(value)
+    # Проверка как у RegexValidator, но без создания валидаторов на вызов.
+    value = str(value)
+    for regex, inverse_match in get_username_regexes():
+        if bool(regex.search(value)) == inverse_match:
+            raise ValidationError(
+                _(f'{value} - недопустимое имя пользователя.'),
+                code='invalid'
+            )
@@ -0,0 +1,292 @@
+"""Прогон маршрутов API на сгенерированных данных.
+
+    python benchmarks/bench_api.py --titles 100000 --reviews 1000000 \\
+        --comments 1000000 --requests 200 --output after.json
+    python benchmarks/bench_api.py --compare before.json after.json
+
+Каждый маршрут из api/urls.py запрашивается `--requests` раз через
+тестовый клиент Django (с middleware, аутентификацией и рендерингом);
+для каждого выводятся p50/p95/p99 времени ответа в миллисекундах и
+число SQL-запросов. Кэш ответов очищается перед каждым запросом, если
+не указан `--warm-cache`. Результаты в JSON сравниваются режимом
+`--compare`: код возврата 1, если p95 вырос больше чем на
+`--threshold` процентов или увеличилось число SQL-запросов.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from itertools import count
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import (  # noqa: E402
+    add_size_arguments, generate, size_options,
+)
+from benchmarks.utils import (  # noqa: E402
+    setup_django, test_database, write_results,
+)
+
+
+def percentile(values, percent):
+    """Значение ранга `percent` процентов (метод ближайшего ранга)."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class QueryCounter:
+    """execute_wrapper, считающий SQL-запросы."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def load_data(args):
+    from django.db import connection
+
+    from reviews.management.commands.data_import import (
+        CSVImporter, PostgresCopyImporter,
+    )
+    from reviews.models import Title
+
+    if Title.objects.exists():
+        print('Данные уже загружены')
+        return
+    importer_class = CSVImporter
+    if connection.vendor == 'postgresql':
+        importer_class = PostgresCopyImporter
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir or tmp_dir
+        if args.data_dir is None:
+            generate(data_dir, **size_options(args))
+        started = time.monotonic()
+        rows = importer_class(data_dir=data_dir).run()
+    print(f'Загружено {rows} строк за {time.monotonic() - started:.1f} с')
+
+
+def get_scenarios():
+    """Маршруты API: (название, метод, адрес, тело, клиент)."""
+    from rest_framework.test import APIClient
+
+    from api.authentication import get_token_for_user
+    from reviews.models import Comment, Genre, Title, User
+
+    def client_for(user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(user)}'
+        )
+        return client
+
+    admin, _ = User.objects.get_or_create(
+        username='bench_admin',
+        defaults={'email': 'bench_admin@yamdb.fake', 'role': 'admin'}
+    )
+    token_user, _ = User.objects.update_or_create(
+        username='bench_token',
+        defaults={
+            'email': 'bench_token@yamdb.fake',
+            'confirmation_code': 'BENCHCODE0',
+        }
+    )
+    comment = Comment.objects.select_related('review').order_by('pk').first()
+    review = comment.review
+    title = Title.objects.get(pk=review.title_id)
+    genre, other_genre = Genre.objects.order_by('pk')[:2]
+    anonymous = APIClient()
+    admin_client = client_for(admin)
+    user_client = client_for(comment.author)
+    signup_numbers = count()
+
+    def signup_data():
+        username = f'bench_signup_{next(signup_numbers)}'
+        return {'username': username, 'email': f'{username}@yamdb.fake'}
+
+    reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+    comments_url = f'{reviews_url}{review.pk}/comments/'
+    return [
+        ('titles', 'get', '/api/v1/titles/', None, anonymous),
+        ('titles_page_100', 'get', '/api/v1/titles/?page=100', None,
+         anonymous),
+        ('titles_cursor', 'get', '/api/v1/titles/?pagination=cursor', None,
+         anonymous),
+        ('titles_filter_genre', 'get',
+         f'/api/v1/titles/?genre={genre.slug}', None, anonymous),
+        ('titles_filter_genres_all', 'get',
+         f'/api/v1/titles/?genre={genre.slug},{other_genre.slug}'
+         '&genre_mode=all', None, anonymous),
+        ('titles_filter_category_year', 'get',
+         f'/api/v1/titles/?category={title.category.slug}&year={title.year}',
+         None, anonymous),
+        ('titles_filter_name', 'get', '/api/v1/titles/?name=фильм', None,
+         anonymous),
+        ('titles_search', 'get', '/api/v1/titles/?search=фильм', None,
+         anonymous),
+        ('titles_fields', 'get', '/api/v1/titles/?fields=id,name,rating',
+         None, anonymous),
+        ('title_detail', 'get', f'/api/v1/titles/{title.pk}/', None,
+         anonymous),
+        ('title_stats', 'get', f'/api/v1/titles/{title.pk}/stats/', None,
+         anonymous),
+        ('title_similar', 'get', f'/api/v1/titles/{title.pk}/similar/',
+         None, anonymous),
+        ('titles_authenticated', 'get', '/api/v1/titles/', None,
+         user_client),
+        ('genres', 'get', '/api/v1/genres/', None, anonymous),
+        ('categories', 'get', '/api/v1/categories/', None, anonymous),
+        ('reviews', 'get', reviews_url, None, anonymous),
+        ('reviews_cursor', 'get', f'{reviews_url}?pagination=cursor', None,
+         anonymous),
+        ('review_detail', 'get', f'{reviews_url}{review.pk}/', None,
+         anonymous),
+        ('comments', 'get', comments_url, None, anonymous),
+        ('comment_detail', 'get', f'{comments_url}{comment.pk}/', None,
+         anonymous),
+        ('comment_create', 'post', comments_url,
+         lambda: {'text': 'Комментарий'}, user_client),
+        ('users', 'get', '/api/v1/users/', None, admin_client),
+        ('users_me', 'get', '/api/v1/users/me/', None, user_client),
+        ('signup', 'post', '/api/v1/auth/signup/', signup_data, anonymous),
+        ('token', 'post', '/api/v1/auth/token/',
+         lambda: {
+             'username': token_user.username,
+             'confirmation_code': token_user.confirmation_code,
+         },
+         anonymous),
+        ('export_genres', 'get', '/api/v1/export/genre/?format=csv', None,
+         admin_client),
+        ('metrics', 'get', '/api/v1/_metrics', None, admin_client),
+        ('analytics_genres', 'get', '/api/v1/analytics/genres/', None,
+         admin_client),
+    ]
+
+
+def run_scenario(scenario, requests, warm_cache):
+    from django.db import connection
+
+    from api.cache import get_cache
+
+    name, method, url, data, client = scenario
+    durations = []
+    queries = []
+    statuses = set()
+    for _ in range(requests):
+        if not warm_cache:
+            get_cache().clear()
+        kwargs = {}
+        if data is not None:
+            kwargs = {'data': data(), 'format': 'json'}
+        counter = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = getattr(client, method)(url, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        durations.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+        statuses.add(response.status_code)
+    return {
+        'name': name,
+        'method': method.upper(),
+        'url': url,
+        'statuses': sorted(statuses),
+        'requests': requests,
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p95_ms': round(percentile(durations, 95), 3),
+        'p99_ms': round(percentile(durations, 99), 3),
+        'queries': max(queries),
+    }
+
+
+def print_results(results):
+    print(f'{"маршрут":<28} {"код":>9} {"p50, мс":>9} {"p95, мс":>9} '
+          f'{"p99, мс":>9} {"SQL":>5}')
+    for result in results:
+        statuses = ','.join(str(status) for status in result['statuses'])
+        print(f'{result["name"]:<28} {statuses:>9} {result["p50_ms"]:>9.2f} '
+              f'{result["p95_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+              f'{result["queries"]:>5}')
+
+
+def compare(before_path, after_path, threshold):
+    """Печатает изменения p95 и SQL; возвращает число регрессий."""
+    with open(before_path, encoding='utf-8') as file:
+        before = {item['name']: item for item in json.load(file)['results']}
+    with open(after_path, encoding='utf-8') as file:
+        after = json.load(file)['results']
+    regressions = 0
+    print(f'{"маршрут":<28} {"p95 до":>9} {"p95 после":>10} {"%":>7} '
+          f'{"SQL до":>7} {"SQL после":>10}')
+    for result in after:
+        old = before.get(result['name'])
+        if old is None:
+            continue
+        change = (result['p95_ms'] / max(old['p95_ms'], 1e-6) - 1) * 100
+        regressed = (
+            change > threshold or result['queries'] > old['queries']
+        )
+        regressions += regressed
+        print(f'{result["name"]:<28} {old["p95_ms"]:>9.2f} '
+              f'{result["p95_ms"]:>10.2f} {change:>+7.1f} '
+              f'{old["queries"]:>7} {result["queries"]:>10}'
+              f'{"  !" if regressed else ""}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    add_size_arguments(parser)
+    parser.add_argument('--data-dir', help='готовый каталог с CSV-файлами')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--only', nargs='*', help='названия маршрутов')
+    parser.add_argument('--warm-cache', action='store_true')
+    parser.add_argument(
+        '--keepdb', action='store_true',
+        help='не удалять тестовую базу и не загружать данные повторно'
+    )
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument(
+        '--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+        help='сравнить два файла результатов'
+    )
+    parser.add_argument('--threshold', type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    setup_django()
+    from django.test.utils import (
+        override_settings, setup_test_environment,
+    )
+
+    setup_test_environment()
+    with test_database(keepdb=args.keepdb), override_settings(
+        EMAIL_ASYNC=False, SLOW_REQUEST_THRESHOLD=None
+    ):
+        load_data(args)
+        results = [
+            run_scenario(scenario, args.requests, args.warm_cache)
+            for scenario in get_scenarios()
+            if not args.only or scenario[0] in args.only
+        ]
+    print_results(results)
+    write_results(args.output, {
+        'options': vars(args),
+        'results': results,
+    })
+
+
+if __name__ == '__main__':
+    main()
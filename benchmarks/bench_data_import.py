@@ -0,0 +1,77 @@
+"""Сравнение скорости data_import: пакетный INSERT и COPY (PostgreSQL).
+
+    python benchmarks/bench_data_import.py --reviews 2000000 \\
+        --comments 2000000 --users 20000 --titles 200000
+
+Данные генерируются в отдельный каталог, загрузка выполняется
+в тестовую базу, которая удаляется после замера.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import (  # noqa: E402
+    add_size_arguments, generate, size_options,
+)
+from benchmarks.utils import (  # noqa: E402
+    flush_database, setup_django, test_database, write_results,
+)
+
+
+def run_import(importer_class, data_dir, batch_size):
+    flush_database()
+    importer = importer_class(data_dir=data_dir, batch_size=batch_size)
+    started = time.monotonic()
+    rows = importer.run()
+    elapsed = time.monotonic() - started
+    return {
+        'importer': importer_class.__name__,
+        'rows': rows,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': int(rows / max(elapsed, 1e-6)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_size_arguments(parser)
+    parser.add_argument('--data-dir', help='готовый каталог с CSV-файлами')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from reviews.management.commands.data_import import (
+        CSVImporter, PostgresCopyImporter,
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = tmp_dir
+            started = time.monotonic()
+            counts = generate(data_dir, **size_options(args))
+            print(f'Сгенерировано {sum(counts.values())} строк за '
+                  f'{time.monotonic() - started:.1f} с')
+        with test_database() as connection:
+            importers = [CSVImporter]
+            if connection.vendor == 'postgresql':
+                importers.append(PostgresCopyImporter)
+            results = [
+                run_import(importer, data_dir, args.batch_size)
+                for importer in importers
+            ]
+    for result in results:
+        print(f'{result["importer"]:<22} {result["rows"]:>10} строк '
+              f'{result["seconds"]:>9.2f} с '
+              f'{result["rows_per_second"]:>9} строк/с')
+    write_results(args.output, {'options': vars(args), 'results': results})
+
+
+if __name__ == '__main__':
+    main()
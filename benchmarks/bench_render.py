@@ -0,0 +1,131 @@
+"""Стоимость вывода элемента списка: сериализатор с JSONRenderer против
+чтения через .values() (api/readers.py) с FastJSONRenderer.
+
+    python benchmarks/bench_render.py --items 1000 --repeat 20
+
+Замер включает запросы к базе, сериализацию и кодирование JSON для
+страницы из `--items` произведений и отзывов, отдельно замеряется только
+кодирование готовых данных сериализатора; данные генерируются
+и загружаются в тестовую базу, которая удаляется после замера.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate  # noqa: E402
+from benchmarks.utils import (  # noqa: E402
+    setup_django, test_database, write_results,
+)
+
+
+def measure(name, func, items, repeat):
+    """Лучшее из `repeat` время одного прогона в микросекундах на элемент."""
+    func()
+    best = min(timed(func) for _ in range(repeat))
+    return {
+        'case': name,
+        'items': items,
+        'us_per_item': round(best / items * 1e6, 2),
+    }
+
+
+def timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def get_cases(items):
+    from rest_framework.renderers import JSONRenderer
+
+    from api.readers import ReviewReader, TitleReader
+    from api.renderers import FastJSONRenderer
+    from api.serializers import ReviewSerializer, TitleGetSerializer
+    from reviews.models import Review, Title
+
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('name', 'id')
+    reviews = Review.objects.select_related('author').order_by('-pub_date')
+
+    def serialized(serializer_class, queryset, renderer):
+        return lambda: renderer.render(
+            serializer_class(queryset.all()[:items], many=True).data
+        )
+
+    def encoded(serializer_class, queryset, renderer):
+        data = serializer_class(queryset.all()[:items], many=True).data
+        return lambda: renderer.render(data)
+
+    def values(reader, queryset, renderer):
+        columns = ['id'] + reader.get_columns()
+        return lambda: renderer.render(reader.read(list(
+            queryset.all().select_related(None).prefetch_related(
+                None
+            ).values(*columns)[:items]
+        )))
+
+    json_renderer = JSONRenderer()
+    fast_renderer = FastJSONRenderer()
+    return [
+        ('titles: JSONRenderer, только кодирование',
+         encoded(TitleGetSerializer, titles, json_renderer)),
+        ('titles: FastJSONRenderer, только кодирование',
+         encoded(TitleGetSerializer, titles, fast_renderer)),
+        ('titles: serializer + JSONRenderer',
+         serialized(TitleGetSerializer, titles, json_renderer)),
+        ('titles: serializer + FastJSONRenderer',
+         serialized(TitleGetSerializer, titles, fast_renderer)),
+        ('titles: TitleReader + FastJSONRenderer',
+         values(TitleReader(), titles, fast_renderer)),
+        ('reviews: JSONRenderer, только кодирование',
+         encoded(ReviewSerializer, reviews, json_renderer)),
+        ('reviews: FastJSONRenderer, только кодирование',
+         encoded(ReviewSerializer, reviews, fast_renderer)),
+        ('reviews: serializer + JSONRenderer',
+         serialized(ReviewSerializer, reviews, json_renderer)),
+        ('reviews: serializer + FastJSONRenderer',
+         serialized(ReviewSerializer, reviews, fast_renderer)),
+        ('reviews: ReviewReader + FastJSONRenderer',
+         values(ReviewReader(), reviews, fast_renderer)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from api.renderers import orjson
+    from reviews.management.commands.data_import import CSVImporter
+
+    with tempfile.TemporaryDirectory() as data_dir, test_database():
+        generate(
+            data_dir, users=args.items, titles=args.items,
+            reviews=args.items * 2, comments=0
+        )
+        CSVImporter(data_dir=data_dir).run()
+        results = [
+            measure(name, func, args.items, args.repeat)
+            for name, func in get_cases(args.items)
+        ]
+    print(f'orjson: {"да" if orjson is not None else "нет"}')
+    for result in results:
+        print(f'{result["case"]:<46} {result["us_per_item"]:>8.2f} мкс')
+    write_results(args.output, {
+        'options': vars(args),
+        'orjson': orjson is not None,
+        'results': results,
+    })
+
+
+if __name__ == '__main__':
+    main()
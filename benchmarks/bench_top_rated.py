@@ -0,0 +1,142 @@
+"""Первая страница лучших произведений при росте каталога.
+
+    python benchmarks/bench_top_rated.py --sizes 10000 100000 300000
+
+Для каждого размера каталога генерируются произведения и по два отзыва
+на произведение, данные загружаются в тестовую базу и замеряются:
+выборка десяти лучших по хранимому рейтингу (индекс title_rating_idx),
+та же выборка через `/api/v1/titles/?ordering=-rating` и прежняя
+сортировка по `Avg('reviews__score')`. Время по индексу не должно
+зависеть от размера каталога. Для наибольшего размера выводится план
+запроса.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import generate  # noqa: E402
+from benchmarks.utils import (  # noqa: E402
+    flush_database, setup_django, test_database, write_results,
+)
+
+PAGE_SIZE = 10
+
+
+def measure(func, repeat):
+    """Лучшее из `repeat` время вызова в миллисекундах."""
+    func()
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return round(best * 1000, 3)
+
+
+def load_data(size, users, seed):
+    from django.db import connection
+
+    from reviews.management.commands.data_import import (
+        CSVImporter, PostgresCopyImporter,
+    )
+
+    importer_class = CSVImporter
+    if connection.vendor == 'postgresql':
+        importer_class = PostgresCopyImporter
+    flush_database()
+    with tempfile.TemporaryDirectory() as data_dir:
+        generate(
+            data_dir, users=users, titles=size, reviews=size * 2,
+            comments=0, seed=seed
+        )
+        importer_class(data_dir=data_dir).run()
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def get_cases():
+    from django.db.models import Avg, F
+    from rest_framework.test import APIClient
+
+    from api.cache import get_cache
+    from reviews.models import Title
+
+    top_rated = Title.objects.order_by(
+        F('rating').desc(nulls_last=True), '-id'
+    ).values('id', 'rating')[:PAGE_SIZE]
+    annotated = Title.objects.annotate(
+        average=Avg('reviews__score')
+    ).order_by(
+        F('average').desc(nulls_last=True), '-id'
+    ).values('id', 'average')[:PAGE_SIZE]
+    client = APIClient()
+
+    def api_page():
+        get_cache().clear()
+        response = client.get('/api/v1/titles/?ordering=-rating')
+        assert response.status_code == 200, response.status_code
+
+    return {
+        'stored_rating': lambda: list(top_rated.all()),
+        'api': api_page,
+        'avg_annotation': lambda: list(annotated.all()),
+    }, top_rated
+
+
+def explain(queryset):
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN ANALYZE {sql}', params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=[10000, 100000, 300000]
+    )
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test.utils import (
+        override_settings, setup_test_environment,
+    )
+
+    setup_test_environment()
+    results = []
+    plan = None
+    with test_database(), override_settings(SLOW_REQUEST_THRESHOLD=None):
+        for size in sorted(args.sizes):
+            load_data(size, args.users, args.seed)
+            cases, top_rated = get_cases()
+            result = {'titles': size}
+            for name, func in cases.items():
+                result[f'{name}_ms'] = measure(func, args.repeat)
+            results.append(result)
+            print(f'{size:>9} произведений: ' + ', '.join(
+                f'{name} {result[f"{name}_ms"]:.2f} мс' for name in cases
+            ))
+            plan = explain(top_rated)
+    print(plan)
+    write_results(args.output, {
+        'options': vars(args),
+        'results': results,
+        'plan': plan,
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Скорость проверки данных регистрации и получения токена.
+
+    python benchmarks/bench_validators.py --number 20000
+
+Сравнивает текущие валидаторы reviews/validators.py с прежней
+реализацией, создававшей RegexValidator и вызывавшей datetime.now()
+на каждую проверку. База данных не используется.
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.utils import setup_django, write_results  # noqa: E402
+
+SIGNUP_DATA = {'username': 'new.user_42', 'email': 'new.user_42@yamdb.fake'}
+TOKEN_DATA = {'username': 'new.user_42', 'confirmation_code': 'ABCDEFGHIJ'}
+
+
+def legacy_validate_username(value):
+    from django.conf import settings
+    from django.core.validators import RegexValidator
+    from django.utils.translation import ugettext_lazy as _
+
+    for regex, inverse_match in settings.USERNAME_REGEXES:
+        RegexValidator(
+            regex=regex,
+            message=_(f'{value} - недопустимое имя пользователя.'),
+            inverse_match=inverse_match
+        )(value)
+
+
+def legacy_validate_year(year):
+    from django.core.exceptions import ValidationError
+
+    current_year = datetime.now().year
+    if year > current_year:
+        raise ValidationError(
+            f'{year} год не может быть больше, чем {current_year}!'
+        )
+
+
+def get_cases():
+    from api.serializers import SignupSerializer, TokenObtainSerializer
+    from reviews.validators import validate_username, validate_year
+
+    return {
+        'validate_username': lambda: validate_username('new.user_42'),
+        'validate_year': lambda: validate_year(2000),
+        'signup': lambda: SignupSerializer(data=SIGNUP_DATA).is_valid(),
+        'token': lambda: TokenObtainSerializer(data=TOKEN_DATA).is_valid(),
+    }
+
+
+def run(number, repeat):
+    results = {}
+    for name, func in get_cases().items():
+        best = min(timeit.repeat(func, number=number, repeat=repeat))
+        results[name] = int(number / best)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    args = parser.parse_args()
+
+    setup_django()
+    import api.serializers
+    import reviews.validators
+
+    current = run(args.number, args.repeat)
+    validators = (
+        reviews.validators.validate_username,
+        reviews.validators.validate_year,
+    )
+    api.serializers.validate_username = legacy_validate_username
+    reviews.validators.validate_username = legacy_validate_username
+    reviews.validators.validate_year = legacy_validate_year
+    try:
+        legacy = run(args.number, args.repeat)
+    finally:
+        api.serializers.validate_username = validators[0]
+        (reviews.validators.validate_username,
+         reviews.validators.validate_year) = validators
+
+    print(f'{"проверок в секунду":<20} {"прежние":>14} {"текущие":>14}')
+    for name in current:
+        print(f'{name:<20} {legacy[name]:>14} {current[name]:>14}')
+    write_results(args.output, {
+        'options': vars(args),
+        'legacy_per_second': legacy,
+        'current_per_second': current,
+    })
+
+
+if __name__ == '__main__':
+    main()
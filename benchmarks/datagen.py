@@ -0,0 +1,149 @@
+"""Детерминированный генератор CSV-файлов в формате static/data.
+
+    python benchmarks/datagen.py /tmp/yamdb_data --reviews 2000000
+"""
+
+import argparse
+import csv
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+ROLES = ('user', 'user', 'user', 'moderator', 'admin')
+WORDS = (
+    'фильм', 'книга', 'песня', 'сюжет', 'герой', 'автор', 'финал', 'жанр',
+    'музыка', 'история', 'роман', 'сцена', 'актёр', 'эпизод', 'рассказ',
+    'отличный', 'скучный', 'яркий', 'долгий', 'смешной', 'грустный',
+)
+START_DATE = datetime(2019, 1, 1, tzinfo=timezone.utc)
+
+
+def words(rnd, count):
+    return ' '.join(rnd.choice(WORDS) for _ in range(count))
+
+
+def write_csv(path, header, rows):
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def generate(path, users=1000, categories=10, genres=30, titles=10000,
+             reviews=100000, comments=100000, seed=0):
+    """Создаёт набор файлов и возвращает количество строк в каждом.
+
+    Пара (автор, произведение) в отзывах уникальна, поэтому
+    `reviews` не может превышать `users * titles`.
+    """
+    if reviews > users * titles:
+        raise ValueError('reviews не может быть больше users * titles')
+    os.makedirs(path, exist_ok=True)
+    rnd = random.Random(seed)
+    counts = {}
+
+    def file(name):
+        return os.path.join(path, name)
+
+    counts['users.csv'] = write_csv(
+        file('users.csv'),
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+        (
+            (i, f'user{i}', f'user{i}@yamdb.fake', rnd.choice(ROLES),
+             words(rnd, 5), '', '')
+            for i in range(1, users + 1)
+        )
+    )
+    counts['category.csv'] = write_csv(
+        file('category.csv'),
+        ('id', 'name', 'slug'),
+        ((i, f'Категория {i}', f'category-{i}')
+         for i in range(1, categories + 1))
+    )
+    counts['genre.csv'] = write_csv(
+        file('genre.csv'),
+        ('id', 'name', 'slug'),
+        ((i, f'Жанр {i}', f'genre-{i}') for i in range(1, genres + 1))
+    )
+    counts['titles.csv'] = write_csv(
+        file('titles.csv'),
+        ('id', 'name', 'year', 'description', 'category'),
+        (
+            (i, f'{words(rnd, 2).capitalize()} {i}',
+             rnd.randint(1900, 2021), words(rnd, 12),
+             rnd.randint(1, categories))
+            for i in range(1, titles + 1)
+        )
+    )
+
+    def genre_title():
+        link_id = 0
+        for title_id in range(1, titles + 1):
+            for genre_id in rnd.sample(range(1, genres + 1),
+                                       rnd.randint(1, min(3, genres))):
+                link_id += 1
+                yield link_id, title_id, genre_id
+
+    counts['genre_title.csv'] = write_csv(
+        file('genre_title.csv'), ('id', 'title_id', 'genre_id'),
+        genre_title()
+    )
+
+    def pub_date(i):
+        return (START_DATE + timedelta(seconds=i * 7)).isoformat()
+
+    # Отзыв i: произведение i % titles, автор (i // titles) % users.
+    counts['review.csv'] = write_csv(
+        file('review.csv'),
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (
+            (i + 1, i % titles + 1, words(rnd, 20),
+             (i // titles) % users + 1, rnd.randint(1, 10), pub_date(i))
+            for i in range(reviews)
+        )
+    )
+    counts['comments.csv'] = write_csv(
+        file('comments.csv'),
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (
+            (i + 1, rnd.randint(1, reviews), words(rnd, 10),
+             rnd.randint(1, users), pub_date(reviews + i))
+            for i in range(comments if reviews else 0)
+        )
+    )
+    return counts
+
+
+def add_size_arguments(parser):
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--categories', type=int, default=10)
+    parser.add_argument('--genres', type=int, default=30)
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--reviews', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def size_options(args):
+    return {
+        name: getattr(args, name)
+        for name in ('users', 'categories', 'genres', 'titles', 'reviews',
+                     'comments', 'seed')
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path')
+    add_size_arguments(parser)
+    args = parser.parse_args()
+    for name, count in generate(args.path, **size_options(args)).items():
+        print(f'{name}: {count}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,84 @@
 import sys
 from os.path import abspath, dirname, join
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 infra_dir_path = join(root_dir, 'infra')
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+
+    cache.clear()
+
+
+def get_auth_client(user):
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=(
+            f'Bearer {RefreshToken.for_user(user).access_token}'
+        )
+    )
+    return client
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='TestAdmin', email='admin@yamdb.fake', role='admin'
+    )
+
+
+@pytest.fixture
+def admin_client(admin):
+    return get_auth_client(admin)
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    # create() вместо bulk_create(): SQLite не возвращает первичные ключи.
+    users = [
+        django_user_model.objects.create(
+            username=f'user{i}', email=f'user{i}@yamdb.fake'
+        )
+        for i in range(15)
+    ]
+    categories = [
+        Category.objects.create(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(15)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+        for i in range(15)
+    ]
+    titles = []
+    for i in range(15):
+        title = Title.objects.create(
+            name=f'Произведение {i}', year=2000 + i, category=categories[i]
+        )
+        title.genre.set(genres[i:i + 3])
+        titles.append(title)
+    title = titles[0]
+    review = Review.objects.create(
+        author=users[0], title=title, text='Отзыв', score=1
+    )
+    Review.objects.bulk_create(
+        Review(author=user, title=title, text='Отзыв', score=i % 10 + 1)
+        for i, user in enumerate(users[1:], start=1)
+    )
+    Comment.objects.bulk_create(
+        Comment(author=user, review=review, text='Комментарий')
+        for user in users
+    )
+    return {'title': title, 'review': review}
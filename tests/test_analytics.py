@@ -0,0 +1,69 @@
+import pytest
+from django.core.management import call_command
+from django.db.models import Avg
+
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db
+class TestAnalytics:
+    url = '/api/v1/analytics/{}/'
+
+    def test_summary_after_refresh(self, admin_client, catalog):
+        Title.objects.refresh_rating()
+        response = admin_client.get(self.url.format('categories'))
+        assert response.status_code == 200
+        assert response.data['stale'] and not response.data['results'], (
+            'Проверьте, что до пересчёта сводка пуста и помечена stale'
+        )
+        call_command('refresh_analytics')
+        response = admin_client.get(self.url.format('categories'))
+        assert not response.data['stale']
+        assert response.data['results'][0] == {
+            'key': 'category-0',
+            'name': 'Категория 0',
+            'title_count': 1,
+            'rated_title_count': 1,
+            'review_count': 15,
+            'average_rating': catalog['title'].reviews.aggregate(
+                value=Avg('score')
+            )['value'],
+        }, 'Проверьте значения сводки по категориям'
+        genres = admin_client.get(self.url.format('genres')).data['results']
+        assert {row['key']: row['title_count'] for row in genres}[
+            'genre-2'
+        ] == 3
+        years = admin_client.get(self.url.format('years')).data['results']
+        assert len(years) == 15
+
+    def test_average_rating_weighs_reviews(self, admin, admin_client,
+                                           catalog):
+        # В жанре genre-2 произведение 0 с 15 отзывами и произведение 2
+        # с одним отзывом.
+        other = Title.objects.get(name='Произведение 2')
+        Review.objects.create(author=admin, title=other, text='Отзыв', score=1)
+        Title.objects.refresh_rating()
+        call_command('refresh_analytics')
+        genres = admin_client.get(self.url.format('genres')).data['results']
+        average_rating = {
+            row['key']: row['average_rating'] for row in genres
+        }['genre-2']
+        assert average_rating == pytest.approx(
+            Review.objects.filter(title__genre__slug='genre-2').aggregate(
+                value=Avg('score')
+            )['value']
+        ), 'Проверьте, что средний рейтинг — средняя оценка отзывов группы'
+
+    def test_empty_dimension_is_fresh_after_refresh(self, admin_client):
+        call_command('refresh_analytics')
+        response = admin_client.get(self.url.format('genres'))
+        assert not response.data['results']
+        assert response.data['refreshed_at'] is not None
+        assert not response.data['stale'], (
+            'Проверьте, что разрез без строк сводки после пересчёта '
+            'не помечается stale'
+        )
+
+    def test_access(self, client, admin_client):
+        assert client.get(self.url.format('years')).status_code == 401
+        assert admin_client.get(self.url.format('users')).status_code == 404
@@ -0,0 +1,37 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .conftest import get_auth_client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCachedJWTAuthentication:
+    # transaction=True: изменения пользователя сбрасывают кэш после фиксации.
+
+    def test_user_is_not_loaded_per_request(self, admin_client):
+        admin_client.get('/api/v1/titles/')
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert not any(
+            'FROM "reviews_user"' in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что пользователь токена берётся из кэша'
+
+    def test_role_change_takes_effect(self, admin, admin_client):
+        assert admin_client.get('/api/v1/users/').status_code == 200
+        admin.role = 'user'
+        admin.save()
+        assert admin_client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что изменение роли действует на выданные токены'
+        )
+
+    def test_deleted_user_is_rejected(self, django_user_model):
+        user = django_user_model.objects.create(
+            username='TestUser', email='user@yamdb.fake'
+        )
+        client = get_auth_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        user.delete()
+        assert client.get('/api/v1/users/me/').status_code == 401
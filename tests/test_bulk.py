@@ -0,0 +1,53 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestBulkWrite:
+
+    def test_titles_bulk_create_and_update(self, admin_client,
+                                           django_assert_max_num_queries):
+        from reviews.models import Title
+
+        admin_client.post('/api/v1/genres/bulk/', data=[
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ], format='json')
+        admin_client.post(
+            '/api/v1/categories/bulk/',
+            data=[{'name': 'Фильм', 'slug': 'movie'}], format='json'
+        )
+        data = [
+            {'name': f'Фильм {i}', 'year': 2000, 'genre': ['drama'],
+             'category': 'movie'}
+            for i in range(20)
+        ]
+        # 8 запросов и увеличение версий данных.
+        with django_assert_max_num_queries(9):
+            response = admin_client.post(
+                '/api/v1/titles/bulk/', data=data, format='json'
+            )
+        assert response.status_code == 201
+        assert Title.objects.filter(genre__slug='drama').count() == 20
+
+        title_id = response.data[0]['id']
+        response = admin_client.patch('/api/v1/titles/bulk/', data=[
+            {'id': title_id, 'genre': ['comedy']}
+        ], format='json')
+        assert response.status_code == 200
+        assert response.data[0]['genre'] == ['comedy']
+
+    def test_bulk_reports_errors_per_item(self, admin_client):
+        from reviews.models import Genre
+
+        response = admin_client.post('/api/v1/genres/bulk/', data=[
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ], format='json')
+        assert response.status_code == 400
+        assert [bool(errors) for errors in response.data] == [
+            True, True, False
+        ], 'Проверьте, что ошибки возвращаются для каждого объекта'
+        assert not Genre.objects.exists(), (
+            'Проверьте, что при ошибках ни один объект не создаётся'
+        )
@@ -0,0 +1,105 @@
+import pytest
+
+from reviews.models import Comment, Review
+
+URLS = {
+    'titles': '/api/v1/titles/',
+    'title': '/api/v1/titles/{title}/',
+    'genres': '/api/v1/genres/',
+    'categories': '/api/v1/categories/',
+}
+
+
+def rename(obj):
+    obj.name = 'Новое название'
+    obj.save()
+
+
+def create_review(catalog, admin):
+    Review.objects.create(
+        author=admin, title=catalog['title'], text='Отзыв', score=10
+    )
+
+
+def create_comment(catalog, admin):
+    Comment.objects.create(
+        author=admin, review=catalog['review'], text='Комментарий'
+    )
+
+
+# Запись и ответы, которые она должна сделать недействительными.
+WRITES = {
+    'title': (
+        lambda catalog, admin: rename(catalog['title']),
+        {'titles', 'title'},
+    ),
+    'genre': (
+        lambda catalog, admin: rename(catalog['title'].genre.first()),
+        {'titles', 'title', 'genres'},
+    ),
+    'category': (
+        lambda catalog, admin: rename(catalog['title'].category),
+        {'titles', 'title', 'categories'},
+    ),
+    'review': (create_review, {'titles', 'title'}),
+    'comment': (create_comment, set()),
+}
+
+
+# transaction=True: версии увеличиваются после фиксации транзакции.
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def get_urls(self, catalog):
+        return {
+            name: url.format(title=catalog['title'].id)
+            for name, url in URLS.items()
+        }
+
+    @pytest.mark.parametrize('name', URLS)
+    def test_miss_then_hit(self, client, catalog, name):
+        url = self.get_urls(catalog)[name]
+        first = client.get(url)
+        assert first['X-Cache'] == 'MISS'
+        second = client.get(url)
+        assert second['X-Cache'] == 'HIT', (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из кэша'
+        )
+        assert second.data == first.data
+
+    @pytest.mark.parametrize('name', URLS)
+    def test_hit_runs_no_queries(self, client, catalog, name,
+                                 django_assert_num_queries):
+        url = self.get_urls(catalog)[name]
+        client.get(url)
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            f'Проверьте, что ответ из кэша на `{url}` не обращается к базе'
+        )
+
+    @pytest.mark.parametrize('write', WRITES)
+    def test_write_invalidates(self, client, admin, catalog, write):
+        write_data, invalidated = WRITES[write]
+        urls = self.get_urls(catalog)
+        for url in urls.values():
+            client.get(url)
+        write_data(catalog, admin)
+        for name, url in urls.items():
+            expected = 'MISS' if name in invalidated else 'HIT'
+            assert client.get(url)['X-Cache'] == expected, (
+                f'Проверьте, что после изменения `{write}` ответ на `{url}` '
+                f'отдаётся со значением X-Cache: {expected}'
+            )
+
+    def test_comment_changes_comments_etag(self, client, admin, catalog):
+        review = catalog['review']
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        )
+        etag = client.get(url)['ETag']
+        create_comment(catalog, admin)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag списка комментариев'
+        )
@@ -0,0 +1,115 @@
+import threading
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+
+from reviews.models import DataVersion
+
+
+# transaction=True: версии увеличиваются после фиксации транзакции.
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_etag_does_not_depend_on_cache(self, client, catalog):
+        url = f'/api/v1/titles/{catalog["title"].id}/'
+        etag = client.get(url)['ETag']
+        cache.clear()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что версии данных хранятся в базе: очистка кэша '
+            'не меняет ETag'
+        )
+
+    def test_commands_change_etag(self, client, catalog):
+        url = f'/api/v1/titles/{catalog["title"].id}/'
+        response = client.get(url)
+        assert response.data['rating'] is None
+        call_command('rebuild_ratings', stdout=StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == 200, (
+            'Проверьте, что пересчёт рейтингов командой меняет ETag'
+        )
+        assert response.data['rating'] is not None
+
+    @pytest.mark.parametrize('field', ['username', 'bio'])
+    def test_author_changes_change_etag(self, admin_client, catalog, field):
+        review = catalog['review']
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/'
+            '?expand=author'
+        )
+        etag = admin_client.get(url)['ETag']
+        response = admin_client.patch(
+            f'/api/v1/users/{review.author.username}/', {field: 'changed'}
+        )
+        assert response.status_code == 200
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что изменение `{field}` автора меняет ETag отзывов '
+            'с `expand=author`'
+        )
+        assert response.data['author'][field] == 'changed'
+
+    def test_review_changes_title_list_etag(self, admin_client, catalog):
+        url = '/api/v1/titles/'
+        etag = admin_client.get(url)['ETag']
+        title = catalog['review'].title
+        versions = DataVersion.objects.get_versions(['titles'])
+        response = admin_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            {'text': 'Отзыв', 'score': 10}
+        )
+        assert response.status_code == 201
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый отзыв меняет ETag списка произведений '
+            'с рейтингами'
+        )
+        assert DataVersion.objects.get_versions(['titles']) == versions, (
+            'Проверьте, что отзывы не меняют версию описаний произведений'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDataVersions:
+
+    def test_bump_after_commit(self):
+        with transaction.atomic():
+            DataVersion.objects.bump('titles')
+            assert DataVersion.objects.get_versions(['titles']) == {
+                'titles': 0
+            }, (
+                'Проверьте, что версия увеличивается после фиксации '
+                'транзакции'
+            )
+        assert DataVersion.objects.get_versions(['titles'])['titles']
+
+    @pytest.mark.skipif(
+        connection.vendor != 'postgresql', reason='lock_timeout PostgreSQL'
+    )
+    def test_bump_does_not_lock_versions(self):
+        errors = []
+
+        def bump_in_other_transaction():
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL lock_timeout = '1s'")
+                    DataVersion.objects.bump('titles')
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            DataVersion.objects.bump('titles')
+            thread = threading.Thread(target=bump_in_other_transaction)
+            thread.start()
+            thread.join()
+        assert not errors, (
+            'Проверьте, что незафиксированная транзакция не блокирует '
+            'строки версий'
+        )
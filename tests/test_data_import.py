@@ -0,0 +1,255 @@
+import csv
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.db.models import Avg, Count
+
+from reviews.management.commands.data_import import (
+    DATA_DIR, CSVImporter, PostgresCopyImporter, UpsertImporter,
+)
+from reviews.models import (
+    Category, Comment, Genre, Review, Title, TitleStats, User,
+)
+
+MODELS = {
+    'users.csv': User,
+    'category.csv': Category,
+    'genre.csv': Genre,
+    'titles.csv': Title,
+    'genre_title.csv': Title.genre.through,
+    'review.csv': Review,
+    'comments.csv': Comment,
+}
+
+# Битые строки: ссылки на отсутствующие категорию, жанр, произведение,
+# автора и отзыв.
+SMALL_DATA = {
+    'users.csv': [
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+        (1, 'reader', 'reader@yamdb.fake', 'user', '', '', ''),
+        (2, 'critic', 'critic@yamdb.fake', 'user', 'Критик', '', ''),
+    ],
+    'category.csv': [('id', 'name', 'slug'), (1, 'Фильм', 'movie')],
+    'genre.csv': [('id', 'name', 'slug'), (1, 'Драма', 'drama')],
+    'titles.csv': [
+        ('id', 'name', 'year', 'category'),
+        (1, 'Первое', 1994, 1),
+        (2, 'Второе', 1972, 1),
+        (3, 'Без категории', 2000, 99),
+    ],
+    'genre_title.csv': [
+        ('id', 'title_id', 'genre_id'), (1, 1, 1), (2, 2, 1), (3, 2, 99),
+    ],
+    'review.csv': [
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (1, 1, 'Отзыв', 1, 10, '2020-01-01T00:00:00Z'),
+        (2, 1, 'Отзыв', 2, 7, '2020-01-02T00:00:00Z'),
+        (3, 2, 'Отзыв', 1, 3, '2020-01-03T00:00:00Z'),
+        (4, 2, 'Отзыв', 2, 4, '2020-01-04T00:00:00Z'),
+        (5, 99, 'Отзыв', 1, 5, '2020-01-05T00:00:00Z'),
+        (6, 1, 'Отзыв', 99, 5, '2020-01-06T00:00:00Z'),
+    ],
+    'comments.csv': [
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (1, 1, 'Комментарий', 2, '2020-02-01T00:00:00Z'),
+        (2, 3, 'Комментарий', 2, '2020-02-02T00:00:00Z'),
+        (3, 99, 'Комментарий', 2, '2020-02-03T00:00:00Z'),
+    ],
+}
+SMALL_COUNTS = {
+    User: 2, Category: 1, Genre: 1, Title: 2, Title.genre.through: 2,
+    Review: 4, Comment: 2,
+}
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='COPY есть только в PostgreSQL'
+)
+
+
+def write_data(data_dir, data):
+    for file, rows in data.items():
+        with open(data_dir / file, 'w', encoding='utf-8', newline='') as out:
+            csv.writer(out).writerows(rows)
+    return str(data_dir)
+
+
+def count_rows(file):
+    with open(os.path.join(DATA_DIR, file), encoding='utf-8') as csvfile:
+        return sum(1 for _row in csv.DictReader(csvfile))
+
+
+def check_titles():
+    """Рейтинг и статистика произведений совпадают с отзывами."""
+    for title in Title.objects.all():
+        reviews = title.reviews.aggregate(count=Count('id'), avg=Avg('score'))
+        assert (title.rating_count, title.rating) == (
+            reviews['count'], reviews['avg']
+        ), f'Проверьте рейтинг произведения «{title.name}» после загрузки'
+        stats = TitleStats.objects.filter(title=title).first()
+        assert (stats.review_count if stats else 0) == reviews['count'], (
+            f'Проверьте статистику произведения «{title.name}» после загрузки'
+        )
+
+
+def check_sequences():
+    category = Category.objects.create(name='Новая', slug='new-category')
+    assert category.pk > max(
+        Category.objects.exclude(pk=category.pk).values_list('pk', flat=True)
+    ), 'Проверьте, что после загрузки сброшены последовательности id'
+
+
+@pytest.mark.django_db
+class TestDataImport:
+
+    @pytest.mark.parametrize('options', [
+        ('--no-copy',), pytest.param((), marks=postgresql_only),
+    ])
+    def test_static_data(self, options):
+        call_command('data_import', *options, stdout=StringIO())
+        for file, model in MODELS.items():
+            assert model.objects.count() == count_rows(file), (
+                f'Проверьте, что из `{file}` загружены все строки'
+            )
+        check_titles()
+        check_sequences()
+
+    @pytest.mark.parametrize('importer_class', [
+        CSVImporter, pytest.param(PostgresCopyImporter, marks=postgresql_only),
+    ])
+    def test_skips_dangling_references(self, tmp_path, importer_class):
+        stdout = StringIO()
+        importer_class(
+            data_dir=write_data(tmp_path, SMALL_DATA), stdout=stdout
+        ).run()
+        for model, count in SMALL_COUNTS.items():
+            assert model.objects.count() == count, (
+                f'Проверьте, что строки `{model.__name__}` с неверными '
+                'ссылками пропускаются'
+            )
+        assert 'review.csv: пропущено строк с неверными ссылками: 2' in (
+            stdout.getvalue()
+        )
+        check_titles()
+        check_sequences()
+
+    def test_incremental(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        options = (
+            '--incremental', '--data-dir', write_data(data_dir, SMALL_DATA),
+            '--checkpoint', str(tmp_path / 'checkpoint.json'),
+        )
+        call_command('data_import', *options, stdout=StringIO())
+        stdout = StringIO()
+        call_command('data_import', *options, stdout=stdout)
+        assert 'review.csv: без изменений с прошлой загрузки' in (
+            stdout.getvalue()
+        )
+        # Отзыв 3 меняет оценку, отзыв 4 того же автора обновляется
+        # по паре автор–произведение.
+        reviews = list(SMALL_DATA['review.csv'])
+        reviews[3] = (3, 2, 'Отзыв', 1, 8, '2020-01-03T00:00:00Z')
+        reviews[4] = (7, 2, 'Новый текст', 2, 9, '2020-01-07T00:00:00Z')
+        write_data(data_dir, {'review.csv': reviews})
+        call_command('data_import', *options, stdout=StringIO())
+        assert Review.objects.count() == 4
+        assert dict(Review.objects.filter(title_id=2).values_list(
+            'author_id', 'score'
+        )) == {1: 8, 2: 9}, (
+            'Проверьте, что инкрементная загрузка обновляет изменённые '
+            'отзывы'
+        )
+        check_titles()
+
+    def test_resume_from_checkpoint(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        write_data(data_dir, SMALL_DATA)
+        checkpoint = tmp_path / 'checkpoint.json'
+
+        class InterruptedImporter(UpsertImporter):
+            def save_batch(self, model, columns, objects):
+                if model is Review and self.checkpoint['review.csv']['rows']:
+                    raise DatabaseError('Соединение разорвано')
+                return super().save_batch(model, columns, objects)
+
+        options = {
+            'data_dir': str(data_dir),
+            'checkpoint_path': str(checkpoint),
+            'batch_size': 2,
+        }
+        with pytest.raises(DatabaseError):
+            InterruptedImporter(**options).run()
+        state = json.loads(checkpoint.read_text(encoding='utf-8'))
+        assert state['titles.csv']['done']
+        assert state['review.csv']['rows'] == 2
+        assert not state['review.csv']['done']
+        assert Review.objects.count() == 2
+
+        stdout = StringIO()
+        UpsertImporter(stdout=stdout, **options).run()
+        assert 'review.csv: продолжение со строки 3' in stdout.getvalue()
+        for model, count in SMALL_COUNTS.items():
+            assert model.objects.count() == count, (
+                'Проверьте, что прерванная загрузка продолжается '
+                'с контрольной точки'
+            )
+        check_titles()
+        assert TitleStats.objects.get(title_id=1).scores == {
+            str(score): int(score in (7, 10)) for score in range(1, 11)
+        }
+
+    def test_incremental_maps_ids(self, tmp_path):
+        # В базе id не совпадают с файлами: «movie» и «drama» уже есть
+        # с другими id, а id 3 новой категории «book» занят.
+        Category.objects.create(id=1, name='Другая', slug='other')
+        Category.objects.create(id=2, name='Фильм', slug='movie')
+        Category.objects.create(id=3, name='Музыка', slug='music')
+        Genre.objects.create(id=5, name='Драма', slug='drama')
+        data = dict(SMALL_DATA)
+        data['category.csv'] = [
+            ('id', 'name', 'slug'),
+            (1, 'Фильм', 'movie'),
+            (3, 'Книга', 'book'),
+        ]
+        data['titles.csv'] = [
+            ('id', 'name', 'year', 'category'),
+            (1, 'Первое', 1994, 1),
+            (2, 'Второе', 1972, 3),
+        ]
+        data_dir = tmp_path / 'data'
+        data_dir.mkdir()
+        options = (
+            '--incremental', '--data-dir', write_data(data_dir, data),
+            '--checkpoint', str(tmp_path / 'checkpoint.json'),
+        )
+        call_command('data_import', *options, stdout=StringIO())
+        book = Category.objects.get(slug='book')
+        assert dict(Title.objects.values_list('id', 'category__slug')) == {
+            1: 'movie', 2: 'book'
+        }, 'Проверьте, что ссылки на категории заменяются на id базы'
+        assert book.pk not in (1, 2, 3)
+        assert Category.objects.get(pk=1).slug == 'other'
+        assert set(Title.genre.through.objects.values_list(
+            'title_id', 'genre_id'
+        )) == {(1, 5), (2, 5)}, (
+            'Проверьте, что ссылки на жанры заменяются на id базы'
+        )
+        # Отзыв автора 2 на произведение 2 получает в файле новый id,
+        # на который ссылается новый комментарий.
+        reviews = list(data['review.csv'])
+        reviews[4] = (10, 2, 'Отзыв', 2, 4, '2020-01-04T00:00:00Z')
+        comments = list(data['comments.csv'])
+        comments.append((4, 10, 'Комментарий', 1, '2020-02-04T00:00:00Z'))
+        write_data(data_dir, {'review.csv': reviews, 'comments.csv': comments})
+        call_command('data_import', *options, stdout=StringIO())
+        review = Review.objects.get(author_id=2, title_id=2)
+        assert Comment.objects.get(pk=4).review_id == review.pk, (
+            'Проверьте, что ссылки на отзывы заменяются на id базы'
+        )
+        check_titles()
@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+TITLES = 20000
+CATEGORIES = 4
+GENRES = 200
+YEARS = 10
+USERS = 1000
+REVIEWED_TITLES = 5
+COMMENTED_REVIEWS = 5
+COMMENTS_PER_REVIEW = 1000
+
+
+@pytest.fixture
+def large_catalog(django_user_model):
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    if connection.vendor != 'postgresql':
+        pytest.skip('Планы запросов проверяются только в PostgreSQL')
+    users = django_user_model.objects.bulk_create(
+        django_user_model(username=f'user{i}', email=f'user{i}@yamdb.fake')
+        for i in range(USERS)
+    )
+    categories = Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(CATEGORIES)
+    )
+    genres = Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(GENRES)
+    )
+    titles = Title.objects.bulk_create(
+        Title(
+            name=f'Произведение {i}', year=1900 + i % YEARS,
+            category=categories[i % CATEGORIES]
+        )
+        for i in range(TITLES)
+    )
+    Title.genre.through.objects.bulk_create(
+        Title.genre.through(title=title, genre=genres[(i + shift) % GENRES])
+        for i, title in enumerate(titles)
+        for shift in (0, 1)
+    )
+    reviews = Review.objects.bulk_create(
+        Review(author=user, title=title, text='Отзыв', score=5)
+        for title in titles[:REVIEWED_TITLES]
+        for user in users
+    )
+    Comment.objects.bulk_create(
+        Comment(author=users[0], review=review, text='Комментарий')
+        for review in reviews[:COMMENTED_REVIEWS]
+        for _ in range(COMMENTS_PER_REVIEW)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return {'title': titles[0], 'review': reviews[0]}
+
+
+def get_main_query(client, url, table):
+    """Запрос страницы результатов: выборка из table с LIMIT."""
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    queries = [
+        query['sql'] for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql'] and 'LIMIT' in query['sql']
+        and 'COUNT(*)' not in query['sql']
+    ]
+    assert queries, f'Не найден запрос страницы `{url}` к таблице {table}'
+    return queries[0]
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN {sql}')
+        return '\n'.join(row[0] for row in cursor.fetchall())
+
+
+# Адрес, таблица запроса страницы, ожидаемый индекс и таблица,
+# которая не должна читаться целиком.
+LIST_QUERIES = (
+    ('/api/v1/titles/{title}/reviews/', 'reviews_review',
+     'review_title_pub_date_idx', 'reviews_review'),
+    ('/api/v1/titles/{title}/reviews/{review}/comments/', 'reviews_comment',
+     'comment_review_pub_date_idx', 'reviews_comment'),
+    ('/api/v1/titles/?category=category-3', 'reviews_title',
+     'title_category_name_idx', 'reviews_title'),
+    ('/api/v1/titles/?year=1905', 'reviews_title', 'title_year_name_idx',
+     'reviews_title'),
+    ('/api/v1/titles/?genre=genre-3', 'reviews_title',
+     'title_genre_genre_title_idx', 'reviews_title_genre'),
+    ('/api/v1/titles/?genre=genre-3,genre-4&genre_mode=all',
+     'reviews_title', 'title_genre_genre_title_idx', 'reviews_title_genre'),
+    ('/api/v1/titles/?ordering=-rating', 'reviews_title', 'title_rating_idx',
+     'reviews_title'),
+    ('/api/v1/titles/?pagination=cursor', 'reviews_title',
+     'title_name_id_idx', 'reviews_title'),
+)
+
+
+@pytest.mark.django_db
+def test_list_queries_use_indexes(client, large_catalog):
+    # Один тест на все адреса: заполнение базы занимает несколько секунд.
+    for url, table, index, scanned_table in LIST_QUERIES:
+        url = url.format(
+            title=large_catalog['title'].id,
+            review=large_catalog['review'].id,
+        )
+        plan = explain(get_main_query(client, url, table))
+        assert index in plan, (
+            f'Проверьте, что запрос страницы `{url}` использует индекс '
+            f'{index}:\n{plan}'
+        )
+        assert f'Seq Scan on {scanned_table}' not in plan, (
+            f'Проверьте, что запрос страницы `{url}` не читает таблицу '
+            f'{scanned_table} целиком:\n{plan}'
+        )
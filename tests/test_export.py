@@ -0,0 +1,38 @@
+import csv
+import io
+import json
+
+import pytest
+
+from .conftest import get_auth_client
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_export_streams_csv_and_ndjson(self, admin_client, catalog):
+        from reviews.models import Review
+
+        response = admin_client.get('/api/v1/export/review/?format=csv')
+        assert response.status_code == 200
+        assert response.streaming, 'Выгрузка должна отдаваться потоком'
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        assert len(rows) == Review.objects.count()
+        assert set(rows[0]) == {
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date'
+        }, 'Столбцы должны совпадать с файлом review.csv для data_import'
+
+        response = admin_client.get('/api/v1/export/titles/?format=ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert json.loads(lines[0])['name'] == 'Произведение 0'
+
+    def test_export_is_admin_only(self, admin_client, django_user_model):
+        user = django_user_model.objects.create(
+            username='reader', email='reader@yamdb.fake'
+        )
+        response = get_auth_client(user).get('/api/v1/export/titles/')
+        assert response.status_code == 403
+        response = admin_client.get('/api/v1/export/unknown/')
+        assert response.status_code == 404
@@ -0,0 +1,35 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_fields_narrow_response_and_query(self, client, catalog):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?fields=id,name,rating')
+        assert response.status_code == 200
+        assert set(response.json()['results'][0]) == {'id', 'name', 'rating'}
+        sql = '\n'.join(query['sql'] for query in context.captured_queries)
+        assert 'description' not in sql, 'Невыводимые столбцы не читаются'
+        assert 'reviews_genre' not in sql, (
+            'Жанры не загружаются, если их нет в ответе'
+        )
+
+        response = client.get('/api/v1/titles/?fields=id,unknown')
+        assert response.status_code == 400
+
+    def test_expand_author(self, client, catalog):
+        from reviews.models import Review
+
+        review = Review.objects.first()
+        response = client.get(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.pk}/'
+            '?fields=id,author&expand=author'
+        )
+        assert response.status_code == 200
+        assert response.json() == {'id': review.pk, 'author': {
+            'username': review.author.username, 'first_name': '',
+            'last_name': '', 'bio': '',
+        }}
@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestGenreFilter:
+    url = '/api/v1/titles/'
+
+    def get_names(self, client, params):
+        response = client.get(self.url, params)
+        assert response.status_code == 200
+        return sorted(item['name'] for item in response.data['results'])
+
+    def test_any_genre(self, client, catalog):
+        # Произведение i относится к жанрам i, i + 1, i + 2.
+        names = self.get_names(client, {'genre': 'genre-0,genre-2'})
+        assert names == [
+            'Произведение 0', 'Произведение 1', 'Произведение 2'
+        ], (
+            'Проверьте, что `genre` со списком жанров возвращает '
+            'произведения любого из них без повторов'
+        )
+
+    def test_all_genres(self, client, catalog):
+        names = self.get_names(
+            client, {'genre': 'genre-2,genre-3', 'genre_mode': 'all'}
+        )
+        assert names == ['Произведение 1', 'Произведение 2'], (
+            'Проверьте, что `genre_mode=all` возвращает произведения '
+            'со всеми перечисленными жанрами'
+        )
+        assert self.get_names(
+            client, {'genre': 'genre-2,unknown', 'genre_mode': 'all'}
+        ) == []
+
+    def test_invalid_mode(self, client, catalog):
+        response = client.get(
+            self.url, {'genre': 'genre-1', 'genre_mode': 'some'}
+        )
+        assert response.status_code == 400
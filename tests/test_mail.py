@@ -0,0 +1,18 @@
+import pytest
+from django.core import mail
+
+
+@pytest.mark.django_db
+def test_signup_sends_code_in_background(client, settings):
+    from api.mail import mail_queue
+
+    settings.EMAIL_ASYNC = True
+    response = client.post(
+        '/api/v1/auth/signup/',
+        data={'username': 'TestUser', 'email': 'user@yamdb.fake'}
+    )
+    assert response.status_code == 200
+    assert mail_queue.flush(timeout=5), (
+        'Проверьте, что письма из очереди отправляются фоновым потоком'
+    )
+    assert [message.to for message in mail.outbox] == [['user@yamdb.fake']]
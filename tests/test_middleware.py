@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+from django.test import override_settings
+
+
+@pytest.mark.django_db
+class TestPerformanceMiddleware:
+
+    def test_server_timing_and_metrics(self, client, admin_client):
+        from api.middleware import metrics
+
+        metrics.clear()
+        response = client.get('/api/v1/genres/')
+        assert 'db;dur=' in response['Server-Timing']
+        assert 'total;dur=' in response['Server-Timing']
+
+        assert client.get('/api/v1/_metrics').status_code == 401
+        response = admin_client.get('/api/v1/_metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert (
+            'yamdb_request_duration_seconds_count{view="api:genres-list"} 1'
+            in text
+        ), 'Метрики должны накапливаться по представлениям'
+        assert 'yamdb_cache_requests_total{namespace="genres"' in text
+
+    def test_slow_request_log(self, client, caplog):
+        with override_settings(SLOW_REQUEST_THRESHOLD=0):
+            with caplog.at_level(logging.WARNING, logger='api.middleware'):
+                client.get('/api/v1/genres/')
+        assert 'FROM "reviews_genre"' in caplog.text, (
+            'В журнал медленных запросов должен попадать SQL'
+        )
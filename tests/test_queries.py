@@ -0,0 +1,131 @@
+import pytest
+
+from .conftest import get_auth_client
+
+# Чтение версий данных для ETag и кэша или их увеличение при записи,
+# см. reviews.models.DataVersion.
+VERSION_QUERIES = 1
+
+
+@pytest.mark.django_db
+class TestListQueries:
+
+    def check_max_queries(self, client, url, max_queries,
+                          django_assert_max_num_queries):
+        with django_assert_max_num_queries(max_queries + VERSION_QUERIES):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+        )
+        assert len(response.data['results']) == 10, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает полную страницу'
+        )
+
+    @pytest.mark.parametrize('url, max_queries', [
+        ('/api/v1/titles/', 3),
+        ('/api/v1/genres/', 2),
+        ('/api/v1/categories/', 2),
+    ])
+    def test_catalog_lists(self, client, catalog, url, max_queries,
+                           django_assert_max_num_queries):
+        self.check_max_queries(
+            client, url, max_queries, django_assert_max_num_queries
+        )
+
+    def test_reviews_list(self, client, catalog,
+                          django_assert_max_num_queries):
+        url = f'/api/v1/titles/{catalog["title"].id}/reviews/'
+        self.check_max_queries(client, url, 3, django_assert_max_num_queries)
+
+    def test_comments_list(self, client, catalog,
+                           django_assert_max_num_queries):
+        review = catalog['review']
+        url = (
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        )
+        self.check_max_queries(client, url, 3, django_assert_max_num_queries)
+
+    def test_users_list(self, admin, catalog,
+                        django_assert_max_num_queries):
+        self.check_max_queries(
+            get_auth_client(admin), '/api/v1/users/', 3,
+            django_assert_max_num_queries
+        )
+
+    @pytest.mark.parametrize('url', [
+        '/api/v1/titles/?pagination=cursor',
+        '/api/v1/titles/{title}/reviews/?pagination=cursor',
+        '/api/v1/titles/{title}/reviews/{review}/comments/?pagination=cursor',
+    ])
+    def test_cursor_pagination_skips_count(self, client, catalog, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = url.format(
+            title=catalog['title'].id, review=catalog['review'].id
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert 'count' not in response.data and response.data['next'], (
+            f'Проверьте, что `{url}` возвращает курсор следующей страницы'
+        )
+        assert not any(
+            'COUNT(' in query['sql'] for query in context.captured_queries
+        ), f'Проверьте, что `{url}` не выполняет COUNT-запрос'
+
+    @pytest.mark.parametrize('param', ['ordering=-rating', 'search=Жанр'])
+    def test_cursor_pagination_rejects_reordering(self, client, catalog,
+                                                  param):
+        url = f'/api/v1/titles/?pagination=cursor&{param}'
+        response = client.get(url)
+        assert response.status_code == 400, (
+            f'Проверьте, что `{url}` возвращает статус 400: курсор '
+            'сохраняет порядок по названию'
+        )
+        response = client.get(f'/api/v1/titles/?{param}')
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWriteQueries:
+    # transaction=True: иначе в подсчёт попадают запросы SAVEPOINT.
+
+    def test_review_create(self, admin, admin_client,
+                           django_assert_max_num_queries):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        # Первый отзыв создаёт строку статистики произведения.
+        with django_assert_max_num_queries(6 + VERSION_QUERIES):
+            response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 201
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв на произведение возвращает '
+            'статус 400'
+        )
+
+    def test_comment_requires_review_of_title(self, admin, admin_client,
+                                              django_assert_max_num_queries):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        other = Title.objects.create(name='Другое', year=2000)
+        review = Review.objects.create(
+            author=admin, title=title, text='Отзыв', score=5
+        )
+        data = {'text': 'Комментарий'}
+        url = f'/api/v1/titles/{other.id}/reviews/{review.id}/comments/'
+        response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 404, (
+            'Проверьте, что комментарий к отзыву чужого произведения '
+            'возвращает статус 404'
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        # Отзыв создан без статистики: она вычисляется заново.
+        with django_assert_max_num_queries(4 + VERSION_QUERIES):
+            response = admin_client.post(url, data=data, format='json')
+        assert response.status_code == 201
@@ -0,0 +1,97 @@
+import pytest
+
+from reviews.models import Review, Title
+
+from .conftest import get_auth_client
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+    url = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self, django_user_model):
+        user = django_user_model.objects.create(
+            username='critic', email='critic@yamdb.fake'
+        )
+        titles = [
+            Title.objects.create(name=name, year=2000)
+            for name in ('Без оценок', 'Хорошее', 'Плохое')
+        ]
+        Review.objects.create(
+            author=user, title=titles[1], text='Отзыв', score=8
+        )
+        Review.objects.create(
+            author=user, title=titles[2], text='Отзыв', score=3
+        )
+        Title.objects.refresh_rating()
+        return titles
+
+    def get_names(self, client, params):
+        response = client.get(self.url, params)
+        assert response.status_code == 200
+        return [item['name'] for item in response.data['results']]
+
+    def test_ordering_puts_unrated_last(self, client, titles):
+        assert self.get_names(client, {'ordering': '-rating'}) == [
+            'Хорошее', 'Плохое', 'Без оценок'
+        ], 'Проверьте, что `ordering=-rating` ставит произведения без оценок '
+        'в конец'
+        assert self.get_names(client, {'ordering': 'rating'}) == [
+            'Плохое', 'Хорошее', 'Без оценок'
+        ]
+
+    def test_rating_range(self, client, titles):
+        assert self.get_names(client, {'rating_min': 5}) == ['Хорошее'], (
+            'Проверьте, что `rating_min` оставляет произведения с рейтингом '
+            'не ниже заданного'
+        )
+        assert self.get_names(client, {'rating_max': 5}) == ['Плохое']
+
+
+@pytest.mark.django_db
+class TestRatingCounters:
+
+    def get_rating(self, title):
+        title.refresh_from_db()
+        return title.rating_sum, title.rating_count, title.rating
+
+    def test_review_changes_update_rating(self, admin, admin_client,
+                                          django_user_model):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user = django_user_model.objects.create(
+            username='critic', email='critic@yamdb.fake'
+        )
+        response = admin_client.post(url, {'text': 'Отзыв', 'score': 4})
+        assert response.status_code == 201
+        review_id = response.data['id']
+        response = get_auth_client(user).post(
+            url, {'text': 'Отзыв', 'score': 9}
+        )
+        assert response.status_code == 201
+        assert self.get_rating(title) == (13, 2, 6.5), (
+            'Проверьте, что новый отзыв увеличивает сумму и число оценок '
+            'произведения'
+        )
+        response = admin_client.patch(f'{url}{review_id}/', {'score': 10})
+        assert response.status_code == 200
+        assert self.get_rating(title) == (19, 2, 9.5), (
+            'Проверьте, что изменение оценки меняет сумму оценок '
+            'произведения'
+        )
+        response = admin_client.delete(f'{url}{review_id}/')
+        assert response.status_code == 204
+        assert self.get_rating(title) == (9, 1, 9.0)
+        response = admin_client.delete(f'{url}{review_id}/')
+        assert response.status_code == 404
+        assert self.get_rating(title) == (9, 1, 9.0), (
+            'Проверьте, что повторное удаление отзыва не меняет рейтинг'
+        )
+        review = Review.objects.get(title=title)
+        response = admin_client.delete(f'{url}{review.id}/')
+        assert response.status_code == 204
+        assert self.get_rating(title) == (0, 0, None), (
+            'Проверьте, что после удаления последнего отзыва рейтинг '
+            'произведения сбрасывается'
+        )
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestValuesReaders:
+
+    @pytest.mark.parametrize('path', [
+        '/api/v1/titles/?ordering=-year',
+        '/api/v1/titles/?fields=id,category&pagination=cursor',
+        '/api/v1/titles/{title}/reviews/?expand=author',
+        '/api/v1/titles/{title}/reviews/{review}/comments/',
+    ])
+    def test_reader_matches_serializer(self, client, catalog, monkeypatch,
+                                       path):
+        from api import views
+        from reviews.models import Comment
+
+        comment = Comment.objects.select_related('review').first()
+        url = path.format(
+            title=comment.review.title_id, review=comment.review_id
+        )
+        response = client.get(url)
+        assert response.status_code == 200
+        for viewset in (views.TitleViewSet, views.ReviewViewSet,
+                        views.CommentViewSet):
+            monkeypatch.setattr(viewset, 'values_reader_class', None)
+        # Ответы произведений анонимным пользователям кэшируются.
+        url += '&' if '?' in url else '?'
+        expected = client.get(url + 'serializer=1')
+        assert response.json()['results'] == expected.json()['results'], (
+            'Чтение через .values() должно совпадать с сериализатором'
+        )
+
+
+def test_fast_json_renderer_matches_json_renderer():
+    pytest.importorskip('orjson')
+    from datetime import datetime, timezone
+    from decimal import Decimal
+
+    from rest_framework.renderers import JSONRenderer
+
+    from api.renderers import FastJSONRenderer
+
+    data = {
+        'text': 'Строка\u2028и абзац\u2029',
+        'pub_date': datetime(2020, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        'rating': 6.5,
+        'score': Decimal('7.25'),
+        'category': None,
+    }
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data), (
+        'Проверьте, что FastJSONRenderer экранирует U+2028 и U+2029 и '
+        'кодирует даты, как JSONRenderer'
+    )
@@ -0,0 +1,55 @@
+import pytest
+
+from reviews.models import Title
+
+from api.search import TitleSearchIndex
+
+
+# transaction=True: индекс поиска SQLite перестраивается по версии
+# произведений, а она увеличивается после фиксации транзакции.
+@pytest.mark.django_db(transaction=True)
+class TestTitleSearch:
+    url = '/api/v1/titles/'
+
+    @pytest.fixture
+    def titles(self):
+        return [
+            Title.objects.create(
+                name='Мастер и Маргарита', year=1967,
+                description='Роман о дьяволе в Москве'
+            ),
+            Title.objects.create(
+                name='Собачье сердце', year=1925,
+                description='Повесть мастера о профессоре'
+            ),
+            Title.objects.create(name='Белая гвардия', year=1925),
+        ]
+
+    def test_search_ranks_name_above_description(self, client, titles):
+        response = client.get(self.url, {'search': 'мастера'})
+        assert response.status_code == 200
+        names = [item['name'] for item in response.data['results']]
+        assert names == ['Мастер и Маргарита', 'Собачье сердце'], (
+            'Проверьте, что поиск по `search` учитывает словоформы и '
+            'ставит совпадения в названии выше совпадений в описании'
+        )
+
+    def test_search_requires_all_words(self, client, titles):
+        response = client.get(self.url, {'search': 'роман в Москве'})
+        assert [item['name'] for item in response.data['results']] == [
+            'Мастер и Маргарита'
+        ]
+        response = client.get(self.url, {'search': 'роман о профессоре'})
+        assert response.data['count'] == 0, (
+            'Проверьте, что поиск находит произведения со всеми словами '
+            'запроса'
+        )
+
+
+def test_python_index_matches_word_forms():
+    index = TitleSearchIndex([
+        (1, 'Мастер и Маргарита', None),
+        (2, 'Сердце', 'Повесть о мастерах'),
+    ])
+    assert index.search('мастеров') == {1: 1.0, 2: 0.4}
+    assert index.search('и') == {}
@@ -0,0 +1,71 @@
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+
+from .conftest import get_auth_client
+
+pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+
+def get_similar(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/similar/')
+    assert response.status_code == 200, (
+        'Проверьте, что GET-запрос к `/api/v1/titles/{id}/similar/` '
+        'возвращает статус 200'
+    )
+    return [item['id'] for item in response.json()]
+
+
+@pytest.mark.django_db
+def test_similar_titles(client, django_user_model):
+    users = [
+        django_user_model.objects.create(
+            username=f'user{i}', email=f'user{i}@yamdb.fake'
+        )
+        for i in range(3)
+    ]
+    first, second, opposite, new = [
+        Title.objects.create(name=f'Произведение {i}', year=2000)
+        for i in range(4)
+    ]
+    for user, scores in zip(users, ((10, 9, 1), (9, 10, 2), (2, 1, 10))):
+        for title, score in zip((first, second, opposite), scores):
+            Review.objects.create(
+                author=user, title=title, text='Отзыв', score=score
+            )
+    Title.objects.refresh_stats()
+    call_command('compute_similar_titles')
+    assert get_similar(client, first) == [second.id], (
+        'Проверьте, что похожими считаются произведения с близкими '
+        'оценками одних и тех же пользователей'
+    )
+    assert get_similar(client, new) == []
+
+    for user, score in zip(users, (10, 9, 1)):
+        get_auth_client(user).post(
+            f'/api/v1/titles/{new.id}/reviews/',
+            {'text': 'Отзыв', 'score': score}, format='json'
+        )
+    call_command('compute_similar_titles', incremental=True)
+    assert get_similar(client, new)[0] == first.id
+    assert new.id in get_similar(client, first), (
+        'Проверьте, что инкрементный расчёт обновляет списки соседей '
+        'произведений с изменёнными отзывами'
+    )
+
+    # Статистика произведения без отзывов удаляется, а не обновляется.
+    new.reviews.all().delete()
+    Title.objects.filter(pk=new.pk).refresh_stats()
+    call_command('compute_similar_titles', incremental=True)
+    assert get_similar(client, new) == []
+    assert new.id not in get_similar(client, first), (
+        'Проверьте, что инкрементный расчёт учитывает произведения, '
+        'у которых не осталось отзывов'
+    )
+
+
+@pytest.mark.django_db
+def test_similar_of_missing_title(client):
+    assert client.get('/api/v1/titles/1/similar/').status_code == 404
@@ -0,0 +1,83 @@
+import pytest
+
+from reviews.models import Title, TitleStats
+
+from .conftest import get_auth_client
+
+
+def get_stats(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/stats/')
+    assert response.status_code == 200, (
+        'Проверьте, что GET-запрос к `/api/v1/titles/{id}/stats/` '
+        'возвращает статус 200'
+    )
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_stats_follow_review_and_comment_writes(client, django_user_model):
+    title = Title.objects.create(name='Произведение', year=2000)
+    assert get_stats(client, title)['review_count'] == 0
+    users = [
+        django_user_model.objects.create(
+            username=f'user{i}', email=f'user{i}@yamdb.fake'
+        )
+        for i in range(3)
+    ]
+    reviews_url = f'/api/v1/titles/{title.id}/reviews/'
+    review_ids = []
+    for user, score in zip(users, (4, 9, 9)):
+        response = get_auth_client(user).post(
+            reviews_url, {'text': 'Отзыв', 'score': score}, format='json'
+        )
+        assert response.status_code == 201
+        review_ids.append(response.json()['id'])
+    author = get_auth_client(users[0])
+    author.patch(
+        f'{reviews_url}{review_ids[0]}/', {'score': 10}, format='json'
+    )
+    comments_url = f'{reviews_url}{review_ids[1]}/comments/'
+    comment_ids = [
+        author.post(comments_url, {'text': 'Комментарий'}).json()['id']
+        for _ in range(3)
+    ]
+    author.delete(f'{comments_url}{comment_ids[0]}/')
+    get_auth_client(users[2]).delete(f'{reviews_url}{review_ids[2]}/')
+
+    stats = get_stats(client, title)
+    assert stats['review_count'] == 2 and stats['comment_count'] == 2
+    assert stats['scores'] == {
+        str(score): int(score in (9, 10)) for score in range(1, 11)
+    }, 'Проверьте, что гистограмма оценок меняется вместе с отзывами'
+
+    TitleStats.objects.all().delete()
+    Title.objects.refresh_stats()
+    rebuilt = get_stats(client, title)
+    assert {**rebuilt, 'updated_at': None} == {**stats, 'updated_at': None}, (
+        'Проверьте, что пересчёт статистики совпадает с инкрементными '
+        'изменениями'
+    )
+
+
+@pytest.mark.django_db
+def test_stats_of_missing_title(client):
+    assert client.get('/api/v1/titles/1/stats/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_missing_stats_are_rebuilt_on_write(admin_client, catalog):
+    # Отзывы и комментарии catalog созданы без статистики, как loaddata.
+    title = catalog['title']
+    response = admin_client.post(
+        f'/api/v1/titles/{title.id}/reviews/', {'text': 'Отзыв', 'score': 2}
+    )
+    assert response.status_code == 201
+    stats = TitleStats.objects.get(title=title)
+    assert (stats.review_count, stats.comment_count) == (16, 15), (
+        'Проверьте, что отсутствующая статистика пересчитывается '
+        'по всем отзывам и комментариям произведения'
+    )
+    scores = stats.scores
+    TitleStats.objects.all().delete()
+    Title.objects.refresh_stats()
+    assert TitleStats.objects.get(title=title).scores == scores
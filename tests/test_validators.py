@@ -0,0 +1,28 @@
+import pytest
+from django.core.exceptions import ValidationError
+from django.test import override_settings
+
+
+class TestValidators:
+
+    def test_username_regexes_reload_on_settings_change(self):
+        from reviews.validators import validate_username
+
+        validate_username('admin')
+        with pytest.raises(ValidationError):
+            validate_username('me')
+        with override_settings(USERNAME_REGEXES=[[r'^admin$', True]]):
+            validate_username('me')
+            with pytest.raises(ValidationError):
+                validate_username('admin')
+        with pytest.raises(ValidationError):
+            validate_username('me')
+
+    def test_validate_year(self):
+        from datetime import datetime
+
+        from reviews.validators import validate_year
+
+        validate_year(datetime.now().year)
+        with pytest.raises(ValidationError):
+            validate_year(datetime.now().year + 1)